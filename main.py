@@ -1,25 +1,96 @@
 import argparse
-from dotenv import load_dotenv
+import importlib
 
-# Importação dos módulos de processamento e modelagem
-from scripts.processamento.carga_informacoes_usinas_eolicas import ProcessadorDadosUsinasEolicas
-from scripts.processamento.carga_informacoes_usinas_solares import ProcessadorDadosUsinasSolares
-from scripts.modelos.processador_regressao_eolica import ProcessadorRegressaoUsinaEolica
-from scripts.modelos.processador_regressao_solar import ProcessadorRegressaoUsinaSolar
+# Apenas módulos leves são importados aqui; os módulos de processamento e
+# modelagem (geopandas, snowflake, xgboost, scikit-learn, matplotlib...) são
+# carregados sob demanda pelo subcomando executado (ver 'carregue').
+from scripts.modelos.estrategias_de_particao import EstrategiaDeParticaoEnum
+from utils.orcamento_de_threads import OrcamentoDeThreads
 
 
-def main():
+def carregue(caminho):
     """
-    Função principal responsável por configurar o menu de opções
-    via linha de comando (argparse) e executar o processamento
-    conforme o comando informado pelo usuário.
+    Importa sob demanda e retorna a classe indicada em 'modulo:Classe'.
+    """
+    modulo, nome = caminho.split(":")
+    return getattr(importlib.import_module(modulo), nome)
+
+
+def adicione_argumentos_preparacao(parser):
+    """
+    Adiciona as opções comuns aos subcomandos de preparação de dados.
+    """
+    parser.add_argument(
+        "--processos", type=int, default=1,
+        help="Processos da preparação em shards por usina (padrão: 1, sem shards)"
+    )
+
+
+def adicione_argumentos_regressao(parser, estrategias=tuple(EstrategiaDeParticaoEnum)):
+    """
+    Adiciona as opções comuns aos subcomandos de regressão.
+
+    Parâmetros:
+        estrategias: estratégias de partição suportadas pelos dados do
+            subcomando (ex.: as usinas solares não têm 'classificacao')
+    """
+    valores = [estrategia.value for estrategia in estrategias]
+    parser.add_argument(
+        "--particionar-por",
+        choices=valores,
+        default=None,
+        help=f"Treina um modelo por partição ({', '.join(valores)})"
+    )
+    parser.add_argument(
+        "--particoes", type=int, default=8,
+        help="Quantidade de partições para coordenadas/altitude (padrão: 8)"
+    )
+    parser.add_argument(
+        "--processos", type=int, default=None,
+        help="Processos usados no treino particionado (padrão: orçamento de threads)"
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="Continua o treino do último modelo salvo com os dados novos (warm start)"
+    )
+    parser.add_argument(
+        "--categoricas", action="store_true",
+        help="Usa usina, estado e classe de potencial como categorias nativas do XGBoost"
+    )
+
+
+def opcoes_regressao(args):
+    """
+    Converte os argumentos da linha de comando nos parâmetros de 'processe_regressao'.
+    """
+    return {
+        "particionar_por": EstrategiaDeParticaoEnum(args.particionar_por) if args.particionar_por else None,
+        "n_particoes": args.particoes,
+        "processos": args.processos,
+        "incremental": args.incremental,
+        "categoricas": args.categoricas,
+    }
+
+
+def crie_parser():
+    """
+    Configura o menu de opções via linha de comando (argparse).
+
+    Cada subcomando registra em 'classe' o caminho 'modulo:Classe' do seu
+    processador, importado somente quando o subcomando é executado.
     """
-    
+
     # --- Configuração inicial do menu principal ---
     parser = argparse.ArgumentParser(
         description="Menu de opções - Processamento e Modelagem de Usinas"
     )
 
+    # Orçamento único de threads para treino, BLAS, downloads e pools de processos
+    parser.add_argument(
+        "--threads", type=int, default=None,
+        help="Threads disponíveis para o processamento (padrão: ORCAMENTO_THREADS ou número de CPUs)"
+    )
+
     # Criação dos subcomandos (agrupamentos de opções)
     subparsers = parser.add_subparsers(dest="command", required=True)
 
@@ -31,8 +102,12 @@ def main():
         "prep-eolicas",
         help="Preparar dados para treinamento de usinas eólicas"
     )
+    adicione_argumentos_preparacao(parser_eolicas)
     parser_eolicas.set_defaults(
-        func=lambda args: ProcessadorDadosUsinasEolicas.prepare_os_dados_para_treino_usina_eolica()
+        classe="scripts.processamento.carga_informacoes_usinas_eolicas:ProcessadorDadosUsinasEolicas",
+        func=lambda args: carregue(args.classe).prepare_os_dados_para_treino_usina_eolica(
+            processos=args.processos
+        )
     )
 
 
@@ -43,8 +118,12 @@ def main():
         "prep-solares",
         help="Preparar dados para treinamento de usinas solares"
     )
+    adicione_argumentos_preparacao(parser_solares)
     parser_solares.set_defaults(
-        func=lambda args: ProcessadorDadosUsinasSolares.prepare_os_dados_para_treino_usina_solar()
+        classe="scripts.processamento.carga_informacoes_usinas_solares:ProcessadorDadosUsinasSolares",
+        func=lambda args: carregue(args.classe).prepare_os_dados_para_treino_usina_solar(
+            processos=args.processos
+        )
     )
 
 
@@ -55,8 +134,10 @@ def main():
         "reg-eolica",
         help="Executar modelo de regressão para usinas eólicas"
     )
+    adicione_argumentos_regressao(parser_reg_eolica)
     parser_reg_eolica.set_defaults(
-        func=lambda args: ProcessadorRegressaoUsinaEolica().processe_regressao()
+        classe="scripts.modelos.processador_regressao_eolica:ProcessadorRegressaoUsinaEolica",
+        func=lambda args: carregue(args.classe)().processe_regressao(**opcoes_regressao(args))
     )
 
 
@@ -67,19 +148,62 @@ def main():
         "reg-solar",
         help="Executar modelo de regressão para usinas solares"
     )
+    adicione_argumentos_regressao(parser_reg_solar, estrategias=[
+        estrategia for estrategia in EstrategiaDeParticaoEnum
+        if estrategia != EstrategiaDeParticaoEnum.CLASSIFICACAO
+    ])
     parser_reg_solar.set_defaults(
-        func=lambda args: ProcessadorRegressaoUsinaSolar().processe_regressao()
+        classe="scripts.modelos.processador_regressao_solar:ProcessadorRegressaoUsinaSolar",
+        func=lambda args: carregue(args.classe)().processe_regressao(**opcoes_regressao(args))
     )
 
 
-    # --- Processa os argumentos e executa a função associada ---
-    args = parser.parse_args()
-    args.func(args)
+    # ==========================================================
+    # SUBCOMANDO: Mapa em grade (raster) do potencial eólico de Goiás
+    # ==========================================================
+    parser_raster = subparsers.add_parser(
+        "raster-eolica-goias",
+        help="Gerar mapa em grade do potencial eólico e da previsão para Goiás"
+    )
+    parser_raster.add_argument(
+        "--resolucao", type=float, default=0.1,
+        help="Espaçamento da grade fina em graus (padrão: 0.1)"
+    )
+    parser_raster.add_argument(
+        "--celulas-por-bloco", type=int, default=64,
+        help="Células processadas por bloco (padrão: 64)"
+    )
+    parser_raster.set_defaults(
+        classe="scripts.processamento.mapa_raster_goias:GeradorDeMapaRasterGoias",
+        func=lambda args: carregue(args.classe).gere(
+            resolucao=args.resolucao, celulas_por_bloco=args.celulas_por_bloco
+        )
+    )
 
 
-if __name__ == "__main__":
+    return parser
+
+
+def main():
+    """
+    Função principal responsável por executar o processamento
+    conforme o comando informado pelo usuário.
+    """
+    # --- Processa os argumentos e executa a função associada ---
+    args = crie_parser().parse_args()
+
     # Carrega as variáveis de ambiente do arquivo 'variaveis.env'
+    # (após o parse: '--help' não precisa delas)
+    from dotenv import load_dotenv
     load_dotenv(dotenv_path="variaveis.env")
 
+    OrcamentoDeThreads.configure(args.threads)
+    args.func(args)
+
+    # Utilização do orçamento de threads por etapa
+    OrcamentoDeThreads.relatorio()
+
+
+if __name__ == "__main__":
     # Executa o programa principal
     main()
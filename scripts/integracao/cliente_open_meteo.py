@@ -0,0 +1,158 @@
+import os
+import json
+import time
+import hashlib
+import requests
+
+from datetime import date, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from utils.escrita_atomica import EscritaAtomica
+from utils.orcamento_de_threads import OrcamentoDeThreads
+
+
+class ClienteOpenMeteo:
+    """
+    Classe responsável por consultar a API histórica do Open-Meteo dividindo a
+    janela de datas em partições mensais.
+
+    Cada mês é baixado em uma requisição própria (em paralelo), com novas
+    tentativas em caso de falha, e gravado em cache local. Assim, ao estender
+    a janela em um mês, apenas o mês novo é baixado.
+
+    A janela padrão pode ser configurada pelas variáveis de ambiente:
+        OPEN_METEO_DATA_INICIO=2024-01-01
+        OPEN_METEO_DATA_FIM=2025-09-26
+
+    Exemplo de uso:
+        data = ClienteOpenMeteo.obtenha("era5", lat, lon, ["windspeed_10m"])
+        data["hourly"]["time"], data["hourly"]["windspeed_10m"], data["elevation"]
+    """
+
+    URL_BASE = "https://archive-api.open-meteo.com/v1"
+    DIRETORIO_CACHE = "data/cache/open_meteo"
+
+    DATA_INICIO_PADRAO = "2024-01-01"
+    DATA_FIM_PADRAO = "2025-09-26"
+
+    # Requisições simultâneas (limitadas pelo orçamento de threads) e novas
+    # tentativas por partição
+    MAX_REQUISICOES_PARALELAS = 4
+    TENTATIVAS = 3
+
+    # Meses que terminam há menos dias do que isso ainda podem ser revisados
+    # pela API (atraso do ERA5) e, por isso, não são gravados em cache
+    DIAS_ATRASO_DADOS = 7
+
+    @staticmethod
+    def janela_configurada():
+        """ Retorna a janela (início, fim) configurada no ambiente. """
+        return (
+            os.getenv("OPEN_METEO_DATA_INICIO", ClienteOpenMeteo.DATA_INICIO_PADRAO),
+            os.getenv("OPEN_METEO_DATA_FIM", ClienteOpenMeteo.DATA_FIM_PADRAO),
+        )
+
+    @staticmethod
+    def particoes_mensais(data_inicio, data_fim):
+        """
+        Divide a janela [data_inicio, data_fim] em meses.
+
+        Retorna:
+            list[tuple(date, date)]: início e fim de cada partição.
+        """
+        inicio = date.fromisoformat(str(data_inicio))
+        fim = date.fromisoformat(str(data_fim))
+
+        particoes = []
+        atual = inicio
+        while atual <= fim:
+            proximo_mes = (atual.replace(day=1) + timedelta(days=32)).replace(day=1)
+            particoes.append((atual, min(fim, proximo_mes - timedelta(days=1))))
+            atual = proximo_mes
+
+        return particoes
+
+    # ==========================================================
+    # CONSULTA PARTICIONADA
+    # ==========================================================
+    @staticmethod
+    def obtenha(endpoint, latitude, longitude, variaveis, fuso_horario=None,
+                data_inicio=None, data_fim=None):
+        """
+        Consulta a série horária das 'variaveis' para a coordenada informada,
+        mês a mês, e devolve a resposta no mesmo formato da API (chaves
+        'hourly' e 'elevation'), com as partições concatenadas em ordem.
+
+        Parâmetros:
+            endpoint: 'era5' ou 'archive'
+            latitude, longitude: coordenada consultada
+            variaveis: lista de variáveis horárias
+            fuso_horario: fuso da API (ex.: 'America/Sao_Paulo'); None = GMT
+            data_inicio, data_fim: janela (padrão: 'janela_configurada()')
+
+        Exceções:
+            requests.RequestException: se alguma partição falhar após as novas tentativas.
+        """
+        inicio_padrao, fim_padrao = ClienteOpenMeteo.janela_configurada()
+        particoes = ClienteOpenMeteo.particoes_mensais(data_inicio or inicio_padrao, data_fim or fim_padrao)
+
+        with OrcamentoDeThreads.reserve("open-meteo", desejado=ClienteOpenMeteo.MAX_REQUISICOES_PARALELAS,
+                                        limitar_blas=False) as n_threads, \
+                ThreadPoolExecutor(max_workers=n_threads) as executor:
+            respostas = list(executor.map(
+                lambda particao: ClienteOpenMeteo._obtenha_particao(
+                    endpoint, latitude, longitude, variaveis, fuso_horario, *particao
+                ),
+                particoes
+            ))
+
+        hourly = {chave: [] for chave in ["time", *variaveis]}
+        for resposta in respostas:
+            for chave in hourly:
+                hourly[chave].extend(resposta.get("hourly", {}).get(chave, []))
+
+        return {"elevation": respostas[0].get("elevation") if respostas else None, "hourly": hourly}
+
+    @staticmethod
+    def _obtenha_particao(endpoint, latitude, longitude, variaveis, fuso_horario, inicio, fim):
+        """ Consulta (ou lê do cache) um único mês da série. """
+        caminho_cache = ClienteOpenMeteo._caminho_cache(endpoint, latitude, longitude, variaveis, fuso_horario, inicio, fim)
+        if os.path.exists(caminho_cache):
+            with open(caminho_cache, encoding="utf-8") as arquivo:
+                return json.load(arquivo)
+
+        url = (
+            f"{ClienteOpenMeteo.URL_BASE}/{endpoint}?"
+            f"latitude={latitude}&longitude={longitude}&"
+            f"start_date={inicio.isoformat()}&end_date={fim.isoformat()}&"
+            f"hourly={','.join(variaveis)}"
+        )
+        if fuso_horario:
+            url += f"&timezone={fuso_horario}"
+
+        for tentativa in range(1, ClienteOpenMeteo.TENTATIVAS + 1):
+            try:
+                response = requests.get(url, timeout=60)
+                response.raise_for_status()
+                data = response.json()
+                break
+            except requests.RequestException:
+                if tentativa == ClienteOpenMeteo.TENTATIVAS:
+                    raise
+                time.sleep(2 ** tentativa)
+
+        # Grava em cache apenas meses já consolidados
+        if fim <= date.today() - timedelta(days=ClienteOpenMeteo.DIAS_ATRASO_DADOS):
+            with EscritaAtomica.arquivo(caminho_cache) as caminho_tmp:
+                with open(caminho_tmp, "w", encoding="utf-8") as arquivo:
+                    json.dump({"elevation": data.get("elevation"), "hourly": data.get("hourly", {})}, arquivo)
+
+        return data
+
+    @staticmethod
+    def _caminho_cache(endpoint, latitude, longitude, variaveis, fuso_horario, inicio, fim):
+        assinatura = hashlib.sha1(f"{','.join(variaveis)}|{fuso_horario}".encode("utf-8")).hexdigest()[:12]
+        coordenada = f"{round(float(latitude), 4)}_{round(float(longitude), 4)}"
+        return os.path.join(
+            ClienteOpenMeteo.DIRETORIO_CACHE, endpoint, coordenada,
+            f"{assinatura}_{inicio.isoformat()}_{fim.isoformat()}.json"
+        )
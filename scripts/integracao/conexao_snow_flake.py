@@ -1,5 +1,4 @@
 import os
-import snowflake.connector
 
 class Conexao:
     """
@@ -9,11 +8,23 @@ class Conexao:
     utilizando variáveis de ambiente para garantir a segurança das credenciais 
     e facilitar a configuração em diferentes ambientes (desenvolvimento, teste, produção).
 
+    Com FONTE_DADOS=local, a conexão é feita com o banco SQLite local
+    montado a partir dos arquivos exportados pelo ONS (ver FonteDeDadosLocal),
+    com a mesma interface de cursor.
+
     Métodos:
-        obtenha(): Estabelece e retorna uma conexão ativa com o banco de dados Snowflake.
+        obtenha(): Estabelece e retorna uma conexão ativa com a fonte configurada
+            (Snowflake por padrão).
     """
     
     def obtenha():
+        if os.getenv("FONTE_DADOS", "snowflake").strip().lower() == "local":
+            from scripts.integracao.fonte_local import FonteDeDadosLocal
+            return FonteDeDadosLocal.obtenha()
+
+        # Conector importado sob demanda (carregamento pesado)
+        import snowflake.connector
+
         conexao = snowflake.connector.connect(
             user=os.getenv("SNOWFLAKE_USER"),
             password=os.getenv("SNOWFLAKE_PASSWORD"),
@@ -0,0 +1,234 @@
+import os
+import csv
+import glob
+import json
+import sqlite3
+
+from datetime import datetime
+from itertools import islice
+
+from utils.escrita_atomica import EscritaAtomica
+
+
+class FonteDeDadosLocal:
+    """
+    Classe responsável por servir a tabela 'fator_capacidade' a partir dos
+    arquivos exportados pelo ONS (CSV separado por ';' ou Parquet), usando um
+    banco SQLite local no lugar do Snowflake.
+
+    Na primeira conexão (ou quando algum arquivo de origem muda) os arquivos
+    são carregados em 'data/cache/fator_capacidade.sqlite', com índice por
+    tipo de usina e usina. As consultas existentes (SELECT/ORDER BY com
+    parâmetros '%s') rodam sem alteração e o cursor expõe a mesma interface
+    usada pelo conector do Snowflake: 'execute', 'description', 'fetchmany',
+    'fetchall' e 'close'.
+
+    Configuração (variaveis.env):
+        FONTE_DADOS=local
+        FONTE_LOCAL_DIRETORIO=data/ons   # pasta com os arquivos do ONS
+    """
+
+    DIRETORIO_PADRAO = "data/ons"
+    CAMINHO_BANCO = "data/cache/fator_capacidade.sqlite"
+    TABELA = "fator_capacidade"
+
+    # Colunas de data/hora devolvidas como datetime (como no Snowflake)
+    COLUNAS_DATA_HORA = {"DIN_INSTANTE"}
+
+    TAMANHO_BLOCO = 200_000
+
+    @staticmethod
+    def obtenha():
+        """
+        Retorna uma conexão com o banco local, (re)construindo-o quando os
+        arquivos de origem forem diferentes dos já carregados.
+
+        Exceções:
+            FileNotFoundError: se não houver arquivos do ONS no diretório configurado.
+        """
+        diretorio = os.getenv("FONTE_LOCAL_DIRETORIO", FonteDeDadosLocal.DIRETORIO_PADRAO)
+        arquivos = FonteDeDadosLocal.arquivos_de_origem(diretorio)
+        if not arquivos:
+            raise FileNotFoundError(f"Nenhum arquivo de fator de capacidade (.csv/.parquet) em: {diretorio}")
+
+        estado = FonteDeDadosLocal._estado_dos_arquivos(arquivos)
+        if FonteDeDadosLocal._leia_estado_do_banco() != estado:
+            FonteDeDadosLocal.construa_banco(arquivos, estado)
+
+        return ConexaoLocal(sqlite3.connect(FonteDeDadosLocal.CAMINHO_BANCO, check_same_thread=False))
+
+    @staticmethod
+    def arquivos_de_origem(diretorio):
+        """ Lista os arquivos .csv e .parquet do diretório, em ordem. """
+        return sorted(
+            glob.glob(os.path.join(diretorio, "*.csv")) + glob.glob(os.path.join(diretorio, "*.parquet"))
+        )
+
+    # ==========================================================
+    # CONSTRUÇÃO DO BANCO
+    # ==========================================================
+    @staticmethod
+    def construa_banco(arquivos, estado):
+        """
+        Carrega os arquivos em um banco novo (arquivo temporário que substitui
+        o anterior apenas ao final) e cria os índices usados pelas consultas.
+        """
+        print(f"Carregando {len(arquivos)} arquivo(s) do ONS em {FonteDeDadosLocal.CAMINHO_BANCO}")
+
+        with EscritaAtomica.arquivo(FonteDeDadosLocal.CAMINHO_BANCO) as caminho_tmp:
+            banco = sqlite3.connect(caminho_tmp)
+            try:
+                banco.execute("PRAGMA journal_mode = OFF")
+                banco.execute("PRAGMA synchronous = OFF")
+
+                for caminho in arquivos:
+                    leitor = FonteDeDadosLocal._leia_parquet(caminho) if caminho.endswith(".parquet") \
+                        else FonteDeDadosLocal._leia_csv(caminho)
+                    colunas = next(leitor)
+                    FonteDeDadosLocal._garanta_colunas(banco, colunas)
+
+                    insercao = (
+                        f"INSERT INTO {FonteDeDadosLocal.TABELA} ({', '.join(colunas)}) "
+                        f"VALUES ({', '.join(['?'] * len(colunas))})"
+                    )
+                    while True:
+                        bloco = list(islice(leitor, FonteDeDadosLocal.TAMANHO_BLOCO))
+                        if not bloco:
+                            break
+                        banco.executemany(insercao, bloco)
+
+                banco.execute(
+                    f"CREATE INDEX idx_tipo_usina ON {FonteDeDadosLocal.TABELA} (nom_tipousina, nom_usina_conjunto)"
+                )
+                banco.execute("CREATE TABLE _manifesto (estado TEXT)")
+                banco.execute("INSERT INTO _manifesto VALUES (?)", (json.dumps(estado, sort_keys=True),))
+                banco.commit()
+            finally:
+                banco.close()
+
+    @staticmethod
+    def _garanta_colunas(banco, colunas):
+        """
+        Cria a tabela (ou acrescenta as colunas que faltam). Colunas 'val_*'
+        têm afinidade REAL: o SQLite converte o texto numérico na inserção.
+        """
+        existentes = {linha[1] for linha in banco.execute(f"PRAGMA table_info({FonteDeDadosLocal.TABELA})")}
+
+        def definicao(coluna):
+            return f"{coluna} {'REAL' if coluna.startswith('val_') else 'TEXT'}"
+
+        if not existentes:
+            banco.execute(f"CREATE TABLE {FonteDeDadosLocal.TABELA} ({', '.join(map(definicao, colunas))})")
+            return
+
+        for coluna in colunas:
+            if coluna not in existentes:
+                banco.execute(f"ALTER TABLE {FonteDeDadosLocal.TABELA} ADD COLUMN {definicao(coluna)}")
+
+    @staticmethod
+    def _leia_csv(caminho):
+        """ Gera o cabeçalho (minúsculo) e depois as linhas do CSV do ONS (';'). """
+        with open(caminho, newline="", encoding="utf-8-sig") as arquivo:
+            leitor = csv.reader(arquivo, delimiter=";")
+            yield [coluna.strip().lower() for coluna in next(leitor)]
+            for linha in leitor:
+                yield [valor if valor != "" else None for valor in linha]
+
+    @staticmethod
+    def _leia_parquet(caminho):
+        """ Gera o cabeçalho (minúsculo) e depois as linhas de um Parquet. """
+        import pandas as pd
+
+        df = pd.read_parquet(caminho)
+        for coluna in df.select_dtypes(include="datetime").columns:
+            df[coluna] = df[coluna].dt.strftime("%Y-%m-%d %H:%M:%S")
+
+        yield [str(coluna).strip().lower() for coluna in df.columns]
+        yield from df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+
+    @staticmethod
+    def _estado_dos_arquivos(arquivos):
+        """ Nome, tamanho e data de modificação de cada arquivo de origem. """
+        estado = {}
+        for caminho in arquivos:
+            info = os.stat(caminho)
+            estado[os.path.basename(caminho)] = {"tamanho": info.st_size, "mtime_ns": info.st_mtime_ns}
+        return estado
+
+    @staticmethod
+    def _leia_estado_do_banco():
+        """ Estado dos arquivos carregados no banco atual, ou None. """
+        if not os.path.exists(FonteDeDadosLocal.CAMINHO_BANCO):
+            return None
+
+        banco = sqlite3.connect(FonteDeDadosLocal.CAMINHO_BANCO)
+        try:
+            linha = banco.execute("SELECT estado FROM _manifesto").fetchone()
+        except sqlite3.DatabaseError:
+            return None
+        finally:
+            banco.close()
+
+        return json.loads(linha[0]) if linha else None
+
+
+class ConexaoLocal:
+    """ Conexão com o banco local, com cursores compatíveis com o Snowflake. """
+
+    def __init__(self, banco):
+        self.banco = banco
+
+    def cursor(self):
+        return CursorLocal(self.banco.cursor())
+
+    def close(self):
+        self.banco.close()
+
+
+class CursorLocal:
+    """
+    Cursor do banco local com o comportamento do cursor do Snowflake:
+    parâmetros no estilo '%s', nomes de colunas em maiúsculas e colunas de
+    data/hora devolvidas como datetime.
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._colunas_data_hora = []
+
+    @property
+    def description(self):
+        if self._cursor.description is None:
+            return None
+        return [(coluna[0].upper(),) + tuple(coluna[1:]) for coluna in self._cursor.description]
+
+    def execute(self, sql, parametros=None):
+        self._cursor.execute(sql.replace("%s", "?"), tuple(parametros or ()))
+
+        self._colunas_data_hora = [
+            i for i, coluna in enumerate(self.description or [])
+            if coluna[0] in FonteDeDadosLocal.COLUNAS_DATA_HORA
+        ]
+        return self
+
+    def fetchmany(self, tamanho):
+        return self._converta(self._cursor.fetchmany(tamanho))
+
+    def fetchall(self):
+        return self._converta(self._cursor.fetchall())
+
+    def close(self):
+        self._cursor.close()
+
+    def _converta(self, linhas):
+        if not self._colunas_data_hora:
+            return linhas
+
+        convertidas = []
+        for linha in linhas:
+            linha = list(linha)
+            for i in self._colunas_data_hora:
+                if linha[i] is not None:
+                    linha[i] = datetime.fromisoformat(linha[i])
+            convertidas.append(tuple(linha))
+        return convertidas
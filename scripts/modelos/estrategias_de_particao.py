@@ -0,0 +1,19 @@
+from enum import Enum
+
+class EstrategiaDeParticaoEnum(Enum):
+    """
+    Essa enum é utilizada para selecionar como as usinas (ou localidades)
+    são agrupadas no treinamento particionado.
+    """
+
+    COORDENADAS = "coordenadas"
+    """Agrupamento (KMeans) das coordenadas latitude/longitude."""
+
+    ALTITUDE = "altitude"
+    """Faixas de altitude definidas por quantis."""
+
+    CLASSIFICACAO = "classificacao"
+    """Classe de potencial (Alto, Médio ou Baixo Potencial)."""
+
+    REGIAO = "regiao"
+    """Região geográfica (Norte, Nordeste, ...) a partir do estado."""
@@ -0,0 +1,174 @@
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+
+from utils.escrita_atomica import EscritaAtomica
+from utils.retencao_de_cache import RetencaoDeCache
+
+
+class GeradorDeFeaturesTemporais:
+    """
+    Classe responsável por gerar features de histórico recente por usina (ou
+    por município, nos dados de Goiás): defasagens (lags), rampas, médias e
+    desvios padrão móveis, além das codificações cíclicas (seno/cosseno).
+
+    Os dados são ordenados uma única vez por (grupo, instante) e todas as
+    janelas são calculadas com operações vetorizadas do NumPy (somas
+    acumuladas e buscas binárias). Defasagens e janelas são medidas em horas
+    de 'instante', e não em linhas: quando a hora de origem de um lag não
+    existe no grupo (horas descartadas pelo ONS ou pelo clima), o lag e a
+    rampa ficam ausentes (NaN), e as janelas móveis usam apenas as horas
+    presentes no intervalo.
+
+    O resultado é gravado em cache (Parquet) com chave no hash do conjunto de
+    dados e da configuração, evitando recálculo a cada 'processe_regressao'.
+    Apenas os 'ARQUIVOS_MANTIDOS' arquivos usados mais recentemente ficam no
+    cache.
+
+    Exemplo de configuração:
+        {
+            "colunas": ["vento_medio_m_s", "rajada_vento_10m"],
+            "lags": [1, 2, 3],
+            "janelas": [3, 6, 24],
+            "ciclicas": {"hora": 24, "mes": 12, "direcao_vento_10m": 360},
+        }
+    """
+
+    DIRETORIO_CACHE = "data/cache/features_temporais"
+
+    # Quantidade de arquivos mantidos no cache (os usados mais recentemente)
+    ARQUIVOS_MANTIDOS = 8
+
+    # Incrementada quando o cálculo muda (invalida o cache anterior)
+    VERSAO_CALCULO = 2
+
+    # ==========================================================
+    # GERAÇÃO (COM CACHE)
+    # ==========================================================
+    @staticmethod
+    def gere(df, configuracao, grupo="nomeUsina", instante="din_instante", com_cache=True):
+        """
+        Retorna um DataFrame (mesmo índice de 'df') com as novas features.
+
+        Parâmetros:
+            df: DataFrame com as colunas do grupo, do instante e as de origem
+            configuracao: dicionário com 'colunas', 'lags', 'janelas' e 'ciclicas'
+            grupo: coluna que identifica a série (usina ou município)
+            instante: coluna de data/hora
+            com_cache: False calcula sem ler nem gravar o cache (dados
+                transitórios, ex.: blocos de células dos mapas em grade)
+        """
+        if not com_cache:
+            return GeradorDeFeaturesTemporais._calcule(df, configuracao, grupo, instante)
+
+        chave = GeradorDeFeaturesTemporais._chave(df, configuracao, grupo, instante)
+        caminho_cache = os.path.join(GeradorDeFeaturesTemporais.DIRETORIO_CACHE, f"{chave}.parquet")
+
+        if os.path.exists(caminho_cache):
+            print(f"Features temporais reutilizadas do cache: {caminho_cache}")
+            os.utime(caminho_cache)  # marca o arquivo como recente (ver 'remova_arquivos_antigos')
+            features = pd.read_parquet(caminho_cache)
+            features.index = df.index
+            return features
+
+        features = GeradorDeFeaturesTemporais._calcule(df, configuracao, grupo, instante)
+
+        with EscritaAtomica.arquivo(caminho_cache) as caminho_tmp:
+            features.reset_index(drop=True).to_parquet(caminho_tmp, index=False)
+        print(f"Features temporais gravadas em cache: {caminho_cache}")
+
+        GeradorDeFeaturesTemporais.remova_arquivos_antigos(manter=caminho_cache)
+        return features
+
+    @staticmethod
+    def remova_arquivos_antigos(manter):
+        """
+        Remove do cache os arquivos além dos 'ARQUIVOS_MANTIDOS' usados mais
+        recentemente (o arquivo 'manter' é sempre preservado). Temporários de
+        outros processos não são tocados.
+        """
+        RetencaoDeCache.mantenha_recentes(
+            GeradorDeFeaturesTemporais.DIRETORIO_CACHE, GeradorDeFeaturesTemporais.ARQUIVOS_MANTIDOS,
+            manter=manter, filtro=lambda entrada: entrada.endswith(".parquet")
+        )
+
+    @staticmethod
+    def _chave(df, configuracao, grupo, instante):
+        """ Hash do conjunto de dados (colunas usadas, em ordem) e da configuração. """
+        colunas = [grupo, instante, *configuracao.get("colunas", []), *configuracao.get("ciclicas", {})]
+        colunas = list(dict.fromkeys(colunas))
+
+        sha = hashlib.sha256()
+        sha.update(pd.util.hash_pandas_object(df[colunas], index=False).to_numpy().tobytes())
+        sha.update(json.dumps({
+            "configuracao": configuracao, "grupo": grupo, "versao": GeradorDeFeaturesTemporais.VERSAO_CALCULO
+        }, sort_keys=True).encode("utf-8"))
+        return sha.hexdigest()
+
+    # ==========================================================
+    # CÁLCULO VETORIZADO
+    # ==========================================================
+    @staticmethod
+    def _calcule(df, configuracao, grupo, instante):
+        codigos_grupo = pd.factorize(df[grupo])[0]
+        instantes = pd.to_datetime(df[instante])
+        horas = ((instantes - instantes.min()) // pd.Timedelta(hours=1)).to_numpy(dtype=np.int64)
+        ordem = np.lexsort((horas, codigos_grupo))
+
+        # Chave ordenada (grupo, hora): grupos separados por mais que a maior
+        # janela, de modo que as buscas nunca atravessam o início de um grupo
+        alcance = max([1, *configuracao.get("lags", []), *configuracao.get("janelas", [])])
+        espacamento = int(horas.max(initial=0)) + alcance + 1
+        chaves = codigos_grupo[ordem].astype(np.int64) * espacamento + horas[ordem]
+        posicoes = np.arange(len(ordem))
+
+        def posicao_da_hora(defasagem):
+            """ Posição da linha 'defasagem' horas antes no mesmo grupo (-1 se ausente). """
+            alvo = chaves - defasagem
+            indices = np.minimum(np.searchsorted(chaves, alvo, side="left"), len(chaves) - 1)
+            return np.where(chaves[indices] == alvo, indices, -1)
+
+        anteriores = {lag: posicao_da_hora(lag) for lag in {1, *configuracao.get("lags", [])}}
+
+        colunas = {}
+
+        for coluna in configuracao.get("colunas", []):
+            valores = df[coluna].to_numpy(dtype=np.float64)[ordem]
+
+            # Defasagens: a hora exata de origem, ou ausente
+            for lag in configuracao.get("lags", []):
+                origem = anteriores[lag]
+                colunas[f"{coluna}_lag{lag}"] = np.where(origem >= 0, valores[origem], np.nan)
+
+            # Rampa em relação à hora anterior
+            origem = anteriores[1]
+            colunas[f"{coluna}_rampa"] = np.where(origem >= 0, valores - valores[origem], np.nan)
+
+            # Médias e desvios móveis por somas acumuladas, sobre as horas
+            # presentes em (hora - janela, hora]
+            soma = np.r_[0.0, np.cumsum(valores)]
+            soma_quadrados = np.r_[0.0, np.cumsum(valores ** 2)]
+            for janela in configuracao.get("janelas", []):
+                inicio = np.searchsorted(chaves, chaves - janela + 1, side="left")
+                quantidade = posicoes - inicio + 1
+                media = (soma[posicoes + 1] - soma[inicio]) / quantidade
+                variancia = (soma_quadrados[posicoes + 1] - soma_quadrados[inicio]) / quantidade - media ** 2
+                colunas[f"{coluna}_media{janela}h"] = media
+                colunas[f"{coluna}_dp{janela}h"] = np.sqrt(np.maximum(variancia, 0))
+
+        # Retorna à ordem original das linhas
+        features = {}
+        for nome, valores in colunas.items():
+            original = np.empty(len(ordem), dtype=np.float32)
+            original[ordem] = valores
+            features[nome] = original
+
+        # Codificações cíclicas (não dependem da ordenação)
+        for coluna, periodo in configuracao.get("ciclicas", {}).items():
+            angulo = 2 * np.pi * df[coluna].to_numpy(dtype=np.float64) / periodo
+            features[f"{coluna}_sen"] = np.sin(angulo).astype(np.float32)
+            features[f"{coluna}_cos"] = np.cos(angulo).astype(np.float32)
+
+        return pd.DataFrame(features, index=df.index)
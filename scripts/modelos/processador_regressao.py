@@ -1,19 +1,31 @@
 import os
+import json
+import hashlib
 import numpy as np
 import pandas as pd
-import xgboost as xgb
-import matplotlib.pyplot as plt
-import seaborn as sns
 
-from xgboost import XGBRegressor, plot_importance
-from sklearn.model_selection import train_test_split, KFold, cross_val_score
+from contextlib import contextmanager
+import xgboost as xgb
+from xgboost import XGBRegressor
+from sklearn.model_selection import train_test_split, KFold
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.linear_model import LinearRegression
 from sklearn.neural_network import MLPRegressor
 from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
 
 from scripts.modelos.modelos_regressao import ModelosEnum
+from scripts.modelos.estrategias_de_particao import EstrategiaDeParticaoEnum
+from scripts.modelos.features_temporais import GeradorDeFeaturesTemporais
+from scripts.modelos.roteador_de_modelos import (
+    ParticionadorDeUsinas, RoteadorDeModelos, treine_modelos_particionados
+)
 from scripts.visualizacao.gerenciador_graficos import GerenciadorDeGraficos
+from scripts.processamento.cubos_zoneamento import GeradorDeCubos
+from utils.armazem_de_features import ArmazemDeFeatures
+from utils.escrita_atomica import EscritaAtomica
+from utils.gerenciador_arquivos import GerenciadorDeArquivos
+from utils.orcamento_de_threads import OrcamentoDeThreads
+from utils.retencao_de_cache import RetencaoDeCache
 
 
 class ProcessadorDeRegressao:
@@ -26,11 +38,38 @@ class ProcessadorDeRegressao:
     # Lista de colunas utilizadas como variáveis preditoras
     feature_cols = []
 
+    # Colunas categóricas (usina, estado, classe de potencial) disponíveis para
+    # o suporte nativo a categorias do XGBoost (ativado por 'usar_categoricas')
+    colunas_categoricas = []
+
+    # Configuração das features de histórico (lags, janelas móveis e cíclicas);
+    # None desativa a geração (ver GeradorDeFeaturesTemporais)
+    features_temporais = None
+
+    # Hiperparâmetros do XGBoost no modo particionado (modelos menores por partição)
+    parametros_xgboost_particao = {"n_estimators": 2000, "max_depth": 8}
+
+    # Treino incremental (warm start a partir do último modelo salvo)
+    diretorio_modelos = "data/resultados/modelos"
+    janela_incremental_dias = 30   # janela recente sempre incluída no treino
+    fracao_replay = 0.2            # amostra de linhas antigas (em relação à janela)
+    rodadas_incrementais = 500     # árvores adicionadas a cada atualização
+    tolerancia_incremental = 0.15  # aumento máximo do RMSE antes do retreino completo
+
+    # Fuso horário dos instantes do clima usado nas predições (ver GeradorDeCubos)
+    fuso_horario_dados = "UTC"
+
+    # Divisão treino/teste e cache das matrizes binárias do XGBoost (DMatrix)
+    semente_divisao = 42
+    fracao_teste = 0.2
+    diretorio_matrizes = "data/cache/matrizes_xgboost"
+    matrizes_mantidas = 2          # entradas do cache de DMatrix por tipo de usina
+
     # ==========================================================
     # CONSTRUTOR
     # ==========================================================
     def __init__(self, modelo_enum: ModelosEnum, df_dados_treino, df_dados_predicao,
-                 nome_arquivo, previsao, tipoDeUsina):
+                 nome_arquivo, previsao, tipoDeUsina, origem_dados_treino=None):
         """
         Inicializa o processador de regressão.
 
@@ -41,6 +80,8 @@ class ProcessadorDeRegressao:
             nome_arquivo: nome do arquivo CSV a ser gerado
             previsao: nome da coluna-alvo (variável dependente)
             tipoDeUsina: string identificando o tipo de usina (eólica ou solar)
+            origem_dados_treino: caminho do arquivo de onde os dados de treino
+                foram lidos (usado para identificar o armazém de features)
         """
         self.df_dados_treino = df_dados_treino
         self.df_dados_predicao = df_dados_predicao
@@ -48,6 +89,11 @@ class ProcessadorDeRegressao:
         self.enumModelo = modelo_enum
         self.previsao = previsao
         self.tipoDeUsina = tipoDeUsina
+        self.origemDadosTreino = origem_dados_treino
+        self.usar_categoricas = False
+        self.colunas_temporais = []
+        self.incremental = False
+        self.categorias = {}
         self.gerenciadorDeGraficos = GerenciadorDeGraficos(modelo_enum)
 
     # ==========================================================
@@ -63,7 +109,8 @@ class ProcessadorDeRegressao:
 
             ModelosEnum.RANDOM_FOREST: RandomForestRegressor(
                 n_estimators=100,
-                random_state=42
+                random_state=42,
+                n_jobs=OrcamentoDeThreads.total()
             ),
 
             ModelosEnum.XGBOOST: XGBRegressor(
@@ -77,7 +124,7 @@ class ProcessadorDeRegressao:
                 min_child_weight=1,
                 gamma=0.05,
                 random_state=42,
-                n_jobs=-1,
+                n_jobs=OrcamentoDeThreads.total(),
                 eval_metric="rmse",
                 early_stopping_rounds=50
             ),
@@ -100,7 +147,8 @@ class ProcessadorDeRegressao:
     def prepare_data_sets(self):
         """
         Prepara os dados de treino e predição, extraindo variáveis
-        temporais (ano, mês, dia, hora, dia da semana).
+        temporais (ano, mês, dia, hora, dia da semana) e, quando configuradas,
+        as features de histórico por usina/município.
         """
         # --- Dados de treino ---
         self.df_dados_treino["din_instante"] = pd.to_datetime(self.df_dados_treino["din_instante"])
@@ -111,7 +159,16 @@ class ProcessadorDeRegressao:
         self.df_dados_treino["hora"] = self.df_dados_treino["din_instante"].dt.hour
         self.df_dados_treino["dia_da_semana"] = self.df_dados_treino["din_instante"].dt.weekday
 
-        self.df_dados_treino.fillna(0, inplace=True)
+        self.adicione_features_temporais(self.df_dados_treino)
+
+        # Preenche ausentes apenas nas colunas não categóricas (as features de
+        # histórico ficam a cargo de 'adicione_features_temporais')
+        colunas_temporais = set(self.colunas_temporais)
+        self.df_dados_treino.fillna({
+            coluna: 0 for coluna in self.df_dados_treino.columns
+            if not isinstance(self.df_dados_treino[coluna].dtype, pd.CategoricalDtype)
+            and coluna not in colunas_temporais
+        }, inplace=True)
 
         # --- Dados de predição ---
         self.df_dados_predicao["din_instante"] = pd.to_datetime(self.df_dados_predicao["din_instante"])
@@ -122,48 +179,187 @@ class ProcessadorDeRegressao:
         self.df_dados_predicao["hora"] = self.df_dados_predicao["din_instante"].dt.hour
         self.df_dados_predicao["dia_da_semana"] = self.df_dados_predicao["din_instante"].dt.weekday
 
+        self.adicione_features_temporais(self.df_dados_predicao)
+
+        self.adicione_features_categoricas()
+
+    def adicione_features_categoricas(self):
+        """
+        Inclui as colunas categóricas em 'feature_cols' (apenas XGBoost com
+        'usar_categoricas') e define em 'self.categorias' o dicionário de
+        cada coluna, usado para codificar treino e predição.
+
+        As colunas de rótulos dos DataFrames não são alteradas: categorias
+        não vistas no treino (ex.: municípios de Goiás no lugar das usinas)
+        viram ausentes apenas na matriz de features, tratadas nativamente
+        pelo XGBoost. No modo incremental, o dicionário do último modelo
+        salvo é mantido e os rótulos novos são acrescentados ao final, de
+        modo que os códigos usados pelas divisões do booster não mudam.
+        """
+        if not (self.usar_categoricas and self.enumModelo == ModelosEnum.XGBOOST):
+            return
+
+        anteriores = {}
+        if self.incremental:
+            anteriores = (self.carregue_metadados() or {}).get("categorias", {})
+
+        for coluna in self.colunas_categoricas:
+            serie = self.df_dados_treino[coluna].astype("category")
+            base = list(anteriores.get(coluna, []))
+            novas = sorted(set(serie.cat.categories) - set(base), key=str)
+
+            self.categorias[coluna] = base + novas
+            self.df_dados_treino[coluna] = serie.cat.set_categories(self.categorias[coluna])
+            if coluna not in self.feature_cols:
+                self.feature_cols.append(coluna)
+
+    def novo_modelo(self):
+        """
+        Retorna uma nova instância do modelo configurado, com o suporte
+        nativo a categorias do XGBoost quando as colunas categóricas estão
+        entre as preditoras.
+        """
+        modelo = ProcessadorDeRegressao.obter_modelo(self.enumModelo)
+
+        categoricas = [coluna in self.colunas_categoricas for coluna in self.feature_cols]
+        if self.enumModelo == ModelosEnum.XGBOOST and any(categoricas):
+            modelo.set_params(
+                enable_categorical=True,
+                tree_method="hist",
+                feature_types=["c" if categorica else "q" for categorica in categoricas]
+            )
+
+        return modelo
+
+    @contextmanager
+    def reserve_threads(self, etapa):
+        """
+        Reserva threads do orçamento do host (ver OrcamentoDeThreads) durante
+        uma etapa de ajuste ou predição, limitando o 'n_jobs' do modelo atual
+        e os pools BLAS/OpenMP à quantidade concedida.
+        """
+        with OrcamentoDeThreads.reserve(f"{self.tipoDeUsina.name.lower()}: {etapa}") as n_threads:
+            if hasattr(self.modelo, "get_params") and "n_jobs" in self.modelo.get_params():
+                self.modelo.set_params(n_jobs=n_threads)
+            yield n_threads
+
+    def adicione_features_temporais(self, df):
+        """
+        Acrescenta ao DataFrame (no próprio objeto) as features de histórico
+        configuradas em 'features_temporais' e as inclui em 'feature_cols'.
+        """
+        if not self.features_temporais:
+            return
+
+        features = GeradorDeFeaturesTemporais.gere(df, self.features_temporais)
+
+        # Horas sem histórico ficam ausentes (NaN) para o XGBoost, que as trata
+        # nativamente; os demais modelos não aceitam ausentes
+        if self.enumModelo != ModelosEnum.XGBOOST:
+            features = features.fillna(0)
+
+        for coluna in features.columns:
+            df[coluna] = features[coluna].to_numpy()
+            if coluna not in self.feature_cols:
+                self.feature_cols.append(coluna)
+            if coluna not in self.colunas_temporais:
+                self.colunas_temporais.append(coluna)
+
+    # ==========================================================
+    # ARMAZÉM DE FEATURES (MEMMAP)
+    # ==========================================================
+    def descreva_features_derivadas(self):
+        """
+        Configuração e versão do cálculo das features geradas após a leitura
+        dos dados (ausentes do arquivo de origem). Compõe a assinatura do
+        armazém: mudar qualquer uma delas gera um novo armazém (e, com ele,
+        novas DMatrix e validação cruzada).
+        """
+        return {
+            "features_temporais": {
+                "configuracao": self.features_temporais,
+                "versao": GeradorDeFeaturesTemporais.VERSAO_CALCULO,
+            },
+        }
+
+    def obtenha_armazem_de_features(self):
+        """
+        Retorna o armazém de features (memmap float32) dos dados de treino,
+        reaproveitando o existente quando o arquivo de origem e as colunas
+        preditoras não mudaram.
+        """
+        if self.origemDadosTreino and os.path.exists(self.origemDadosTreino):
+            hash_origem = GerenciadorDeArquivos.calcule_hash(self.origemDadosTreino)
+        else:
+            # Sem arquivo de origem conhecido: a versão é identificada pelo conteúdo
+            hash_origem = ArmazemDeFeatures.calcule_hash_dados(
+                self.df_dados_treino, self.feature_cols + [self.previsao]
+            )
+
+        assinatura = ArmazemDeFeatures.calcule_assinatura(
+            hash_origem, self.feature_cols, self.previsao, self.categorias,
+            features_derivadas=self.descreva_features_derivadas()
+        )
+
+        return ArmazemDeFeatures.obtenha(
+            self.tipoDeUsina.name.lower(), self.df_dados_treino,
+            self.feature_cols, self.previsao, assinatura
+        )
+
     # ==========================================================
     # TREINAMENTO E AVALIAÇÃO
     # ==========================================================
-    def processe_regressao(self, k_fold=5):
+    def processe_regressao(self, k_fold=5, particionar_por: EstrategiaDeParticaoEnum = None,
+                           n_particoes=8, processos=None, incremental=False, categoricas=False):
         """
         Executa o processo completo de treinamento, avaliação e geração
         de predições, exibindo métricas e gráficos.
+
+        Parâmetros:
+            k_fold: quantidade de folds da validação cruzada (modo global)
+            particionar_por: quando informado, treina um modelo menor por
+                partição (em paralelo) no lugar do modelo global
+            n_particoes: quantidade de partições (coordenadas e altitude)
+            processos: quantidade de processos do treino particionado
+            incremental: continua o boosting do último modelo salvo com as
+                linhas novas (janela recente + amostra de replay); retorna ao
+                treino completo se não houver modelo ou se o erro piorar
+            categoricas: expõe usina, estado e classe de potencial ao XGBoost
+                como variáveis categóricas nativas
         """
         # --- Etapa 1: preparar os dados ---
+        self.usar_categoricas = categoricas
+        self.incremental = incremental
         self.prepare_data_sets()
 
         # --- Etapa 2: selecionar o modelo ---
-        self.modelo = ProcessadorDeRegressao.obter_modelo(self.enumModelo)
+        self.modelo = self.novo_modelo()
 
-        X = self.df_dados_treino[self.feature_cols]
-        y = self.df_dados_treino[self.previsao]
+        # Matriz de features mapeada em memória (sem cópia do DataFrame)
+        armazem = self.obtenha_armazem_de_features()
+        X, y = armazem.X, armazem.y
 
-        # --- Etapa 3: divisão em treino e teste (80/20) ---
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42
-        )
+        # --- Etapas 3 e 4: warm start do último modelo (modo incremental) ---
+        divisao = None
+        if incremental and particionar_por is None:
+            divisao = self.treine_incremental(armazem)
+        atualizado_incrementalmente = divisao is not None
 
-        self.realize_validacao_cruzada_kfold(X=X, y=y, k_fold=5)
+        # --- Etapas 3 e 4: treino completo ---
+        if divisao is None:
+            divisao = self.treine_completo(armazem, k_fold, particionar_por, n_particoes, processos)
 
-        # --- Etapa 4: treinamento ---
-        if self.enumModelo == ModelosEnum.XGBOOST:
-            # Treino com monitoramento (validação cruzada interna)
-            self.modelo.fit(
-                X_train, y_train,
-                eval_set=[(X_train, y_train), (X_test, y_test)],
-                verbose=False
-            )
+        idx_train, idx_test = divisao
+        if len(idx_test) == 0:
+            # Modelo salvo reutilizado sem linhas novas: não há validação a reportar
+            self.aplique_modelo()
+            self.gerenciadorDeGraficos.aguarde()
+            return
 
-            # Curva de erro (XGBoost)
-            results = self.modelo.evals_result()
-            self.gerenciadorDeGraficos.gere_grafico_curva_de_erro(results, self.tipoDeUsina)
-        else:
-            # Modelos simples (sem early stopping)
-            self.modelo.fit(X_train, y_train)
+        X_test, y_test = X[idx_test], y[idx_test]
 
         # --- Etapa 5: predição e métricas ---
-        y_pred = np.maximum(self.modelo.predict(X_test), 0)
+        y_pred = self.preveja_matriz(X_test, indices=idx_test)
 
         mse = mean_squared_error(y_test, y_pred)
         rmse = np.sqrt(mse)
@@ -178,6 +374,10 @@ class ProcessadorDeRegressao:
             "R²": round(r2, 3)
         })
 
+        # Persiste o modelo global do XGBoost para futuros treinos incrementais
+        if self.enumModelo == ModelosEnum.XGBOOST and particionar_por is None:
+            self.salve_modelo(rmse, incremental=atualizado_incrementalmente)
+
         # --- Etapa 6: gráfico de comparação real vs previsto ---
         self.gerenciadorDeGraficos.gere_grafico_programada_real(
             y_test, y_pred, self.tipoDeUsina
@@ -186,6 +386,51 @@ class ProcessadorDeRegressao:
         # --- Etapa 7: gerar arquivo com previsões ---
         self.aplique_modelo()
 
+        # Aguarda os gráficos renderizados em segundo plano
+        self.gerenciadorDeGraficos.aguarde()
+
+    def treine_completo(self, armazem, k_fold, particionar_por, n_particoes, processos):
+        """
+        Treina o modelo do zero (global ou particionado) sobre a divisão
+        80/20 do armazém de features.
+
+        Retorna:
+            tuple(np.ndarray, np.ndarray): índices de treino e teste do armazém.
+        """
+        X, y = armazem.X, armazem.y
+
+        # --- Etapa 3: divisão em treino e teste (80/20) por índices ---
+        idx_train, idx_test = train_test_split(
+            np.arange(armazem.n_linhas), test_size=self.fracao_teste, random_state=self.semente_divisao
+        )
+
+        # Validação cruzada apenas no modo global (o particionado dispensa o custo);
+        # com as matrizes em cache, o resultado da validação também é reaproveitado
+        if particionar_por is None:
+            diretorio_cache = self.diretorio_cache_xgboost(armazem) if self.enumModelo == ModelosEnum.XGBOOST else None
+            self.realize_validacao_cruzada_kfold(X=X, y=y, k_fold=k_fold, diretorio_cache=diretorio_cache)
+
+        # --- Etapa 4: treinamento ---
+        if particionar_por is not None:
+            # Um modelo por partição, treinados em paralelo, com roteamento
+            self.modelo = self.treine_particionado(
+                armazem, idx_train, particionar_por, n_particoes, processos
+            )
+        elif self.enumModelo == ModelosEnum.XGBOOST:
+            # Treino com monitoramento sobre as matrizes binárias (em cache)
+            d_treino, d_teste = self.obtenha_matrizes_xgboost(armazem, idx_train, idx_test)
+            with self.reserve_threads("treino"):
+                results = self.treine_xgboost(d_treino, d_teste)
+
+            # Curva de erro (XGBoost)
+            self.gerenciadorDeGraficos.gere_grafico_curva_de_erro(results, self.tipoDeUsina)
+        else:
+            # Modelos simples (sem early stopping)
+            with self.reserve_threads("treino"):
+                self.modelo.fit(X[idx_train], y[idx_train])
+
+        return idx_train, idx_test
+
     # ==========================================================
     # GERAÇÃO DE RESULTADOS
     # ==========================================================
@@ -193,10 +438,10 @@ class ProcessadorDeRegressao:
         """
         Aplica o modelo treinado ao conjunto de predição e salva os
         resultados em um arquivo CSV dentro de 'data/resultados/arquivos'.
+        Em seguida, agrega as predições nos cubos de zoneamento
+        (município × mês × hora) em 'data/resultados/cubos'.
         """
-        X = self.df_dados_predicao[self.feature_cols]
-        y_pred = np.maximum(self.modelo.predict(X), 0)
-        self.df_dados_predicao[self.previsao] = y_pred
+        self.df_dados_predicao[self.previsao] = self.preveja(self.df_dados_predicao)
 
         # Cria diretório de saída, se não existir
         os.makedirs("data/resultados/arquivos", exist_ok=True)
@@ -206,29 +451,419 @@ class ProcessadorDeRegressao:
 
         print(f"Arquivo gerado: {caminho_csv}")
 
+        # Cubos agregados para as análises de zoneamento e sazonalidade
+        GeradorDeCubos.gere_cubo(self.df_dados_predicao, self.tipoDeUsina, self.previsao, self.fuso_horario_dados)
+        GeradorDeCubos.gere_complementaridade()
+
+    def preveja(self, df):
+        """
+        Aplica o modelo treinado (global ou particionado) a um DataFrame
+        que já passou pela preparação das features.
+
+        Retorna:
+            np.ndarray: predições não negativas.
+        """
+        X = ArmazemDeFeatures.matriz(df, self.feature_cols, categorias=self.categorias)
+
+        if isinstance(self.modelo, RoteadorDeModelos):
+            rotulos = self.modelo.particionador.rotule(df)
+            return np.maximum(self.modelo.predict(X, rotulos), 0)
+
+        with self.reserve_threads("predição"):
+            return np.maximum(self.modelo.predict(X), 0)
+
+    def preveja_matriz(self, X, indices):
+        """
+        Prediz linhas do armazém de treino (X já em float32); 'indices'
+        identifica as linhas para o roteamento do modo particionado.
+        """
+        if isinstance(self.modelo, RoteadorDeModelos):
+            return np.maximum(self.modelo.predict(X, self.rotulos_treino[indices]), 0)
+
+        with self.reserve_threads("predição"):
+            return np.maximum(self.modelo.predict(X), 0)
+
+    # ==========================================================
+    # MATRIZES BINÁRIAS DO XGBOOST (CACHE)
+    # ==========================================================
+    def diretorio_cache_xgboost(self, armazem):
+        """
+        Diretório do cache das matrizes (e da validação cruzada) do XGBoost,
+        com chave na assinatura do armazém (hash do arquivo de origem, colunas
+        preditoras, alvo e categorias), na semente e na fração da divisão e
+        nos tipos das colunas. None quando não há arquivo de origem conhecido.
+        """
+        if not (self.origemDadosTreino and os.path.exists(self.origemDadosTreino)):
+            return None
+
+        conteudo = json.dumps({
+            "assinatura": armazem.schema["assinatura"],
+            "n_linhas": armazem.n_linhas,
+            "semente": self.semente_divisao,
+            "fracao_teste": self.fracao_teste,
+            "feature_types": self.modelo.get_params().get("feature_types"),
+        }, sort_keys=True)
+        chave = hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+        return os.path.join(self.diretorio_matrizes, f"{self.tipoDeUsina.name.lower()}_{chave[:16]}")
+
+    def obtenha_matrizes_xgboost(self, armazem, idx_train, idx_test):
+        """
+        Retorna as DMatrix de treino e de validação. As matrizes são gravadas
+        no formato binário do XGBoost (ver 'diretorio_cache_xgboost');
+        execuções seguintes sobre os mesmos dados carregam os binários sem
+        reconstruir as matrizes. Entradas de dados antigos são removidas,
+        mantendo apenas as 'matrizes_mantidas' mais recentes por tipo de usina.
+
+        Retorna:
+            tuple(xgboost.DMatrix, xgboost.DMatrix): treino e validação.
+        """
+        parametros = self.modelo.get_params()
+        tipos = parametros.get("feature_types")
+        categorica = bool(parametros.get("enable_categorical"))
+
+        def construa(indices):
+            return xgb.DMatrix(
+                armazem.X[indices], label=armazem.y[indices], missing=np.nan,
+                feature_types=tipos, enable_categorical=categorica
+            )
+
+        # Sem arquivo de origem conhecido não há como identificar os dados
+        diretorio = self.diretorio_cache_xgboost(armazem)
+        if diretorio is None:
+            return construa(idx_train), construa(idx_test)
+
+        caminhos = [os.path.join(diretorio, "treino.buffer"), os.path.join(diretorio, "validacao.buffer")]
+
+        if all(os.path.exists(caminho) for caminho in caminhos):
+            print(f"Matrizes do XGBoost reutilizadas do cache: {diretorio}")
+            os.utime(diretorio)
+            return tuple(xgb.DMatrix(caminho) for caminho in caminhos)
+
+        matrizes = construa(idx_train), construa(idx_test)
+
+        for matriz, caminho in zip(matrizes, caminhos):
+            with EscritaAtomica.arquivo(caminho) as caminho_tmp:
+                matriz.save_binary(caminho_tmp, silent=True)
+        print(f"Matrizes do XGBoost gravadas em cache: {diretorio}")
+
+        self.remova_matrizes_antigas(manter=diretorio)
+        return matrizes
+
+    def remova_matrizes_antigas(self, manter):
+        """
+        Remove as entradas do cache de matrizes deste tipo de usina além das
+        'matrizes_mantidas' mais recentes (a entrada 'manter' é preservada).
+        """
+        prefixo = f"{self.tipoDeUsina.name.lower()}_"
+        removidas = RetencaoDeCache.mantenha_recentes(
+            self.diretorio_matrizes, self.matrizes_mantidas,
+            manter=manter, filtro=lambda nome: nome.startswith(prefixo)
+        )
+
+        for entrada in removidas:
+            print(f"Matrizes do XGBoost removidas do cache: {entrada}")
+
+    def treine_xgboost(self, d_treino, d_teste):
+        """
+        Treina o booster diretamente sobre as DMatrix (mesmos hiperparâmetros,
+        early stopping e métrica do XGBRegressor configurado) e carrega o
+        resultado em 'self.modelo', mantendo a interface scikit-learn para
+        predição e persistência.
+
+        Retorna:
+            dict: histórico de erro por rodada (formato de 'evals_result()').
+        """
+        historico = {}
+        booster = xgb.train(
+            self.modelo.get_xgb_params(), d_treino,
+            num_boost_round=self.modelo.n_estimators,
+            evals=[(d_treino, "validation_0"), (d_teste, "validation_1")],
+            early_stopping_rounds=self.modelo.early_stopping_rounds,
+            evals_result=historico,
+            verbose_eval=False
+        )
+
+        self.modelo.load_model(bytearray(booster.save_raw(raw_format="json")))
+        return historico
+
+    # ==========================================================
+    # TREINAMENTO INCREMENTAL (WARM START)
+    # ==========================================================
+    @staticmethod
+    def caminhos_do_modelo(tipo_de_usina, modelo_enum: ModelosEnum):
+        """ Caminho do último modelo salvo (e do seu arquivo de metadados). """
+        nome = f"{tipo_de_usina.name.lower()}_{modelo_enum.name.lower()}"
+        return os.path.join(ProcessadorDeRegressao.diretorio_modelos, f"{nome}.json"), \
+            os.path.join(ProcessadorDeRegressao.diretorio_modelos, f"{nome}.meta.json")
+
+    def caminho_modelo(self):
+        """ Caminho do último modelo salvo deste processador (e dos metadados). """
+        return ProcessadorDeRegressao.caminhos_do_modelo(self.tipoDeUsina, self.enumModelo)
+
+    @staticmethod
+    def carregue_modelo_salvo(tipo_de_usina, modelo_enum: ModelosEnum = ModelosEnum.XGBOOST):
+        """
+        Carrega o último modelo salvo por 'salve_modelo' fora de um
+        processamento de regressão (ex.: mapas em grade de Goiás).
+
+        Retorna:
+            tuple(modelo, dict): modelo pronto para 'predict' e seus metadados
+            (colunas preditoras, categorias e features temporais).
+
+        Exceções:
+            FileNotFoundError: se ainda não houver modelo salvo para o tipo de usina.
+        """
+        caminho, caminho_meta = ProcessadorDeRegressao.caminhos_do_modelo(tipo_de_usina, modelo_enum)
+        if not (os.path.exists(caminho) and os.path.exists(caminho_meta)):
+            raise FileNotFoundError(f"Modelo não encontrado: {caminho}. Execute a regressão antes.")
+
+        with open(caminho_meta, encoding="utf-8") as arquivo:
+            metadados = json.load(arquivo)
+
+        modelo = ProcessadorDeRegressao.obter_modelo(modelo_enum)
+        categorias = metadados.get("categorias", {})
+        if categorias:
+            modelo.set_params(
+                enable_categorical=True,
+                tree_method="hist",
+                feature_types=["c" if coluna in categorias else "q" for coluna in metadados["feature_cols"]]
+            )
+        modelo.load_model(caminho)
+
+        return modelo, metadados
+
+    def carregue_metadados(self):
+        """ Retorna os metadados do último modelo salvo ou None. """
+        caminho, caminho_meta = self.caminho_modelo()
+        if not (os.path.exists(caminho) and os.path.exists(caminho_meta)):
+            return None
+
+        with open(caminho_meta, encoding="utf-8") as arquivo:
+            return json.load(arquivo)
+
+    def salve_modelo(self, rmse, incremental=False):
+        """
+        Salva o booster treinado e os metadados usados no treino incremental:
+        último instante visto, colunas preditoras e RMSE de referência (o do
+        último treino completo, usado como base pela proteção contra deriva).
+        """
+        caminho, caminho_meta = self.caminho_modelo()
+        os.makedirs(self.diretorio_modelos, exist_ok=True)
+
+        anterior = self.carregue_metadados() if incremental else None
+        self.modelo.save_model(caminho)
+
+        metadados = {
+            "feature_cols": list(self.feature_cols),
+            "categorias": self.categorias,
+            "features_temporais": self.features_temporais,
+            "ultimo_instante": str(self.df_dados_treino["din_instante"].max()),
+            "n_linhas": len(self.df_dados_treino),
+            "rmse_referencia": anterior["rmse_referencia"] if anterior else float(rmse),
+            "rmse_ultimo": float(rmse),
+            "modo": "incremental" if incremental else "completo",
+            "atualizado_em": pd.Timestamp.now().isoformat(),
+        }
+        with open(caminho_meta, "w", encoding="utf-8") as arquivo:
+            json.dump(metadados, arquivo, ensure_ascii=False, indent=2)
+
+        print(f"Modelo salvo: {caminho}")
+
+    def treine_incremental(self, armazem):
+        """
+        Continua o boosting do último modelo salvo usando a janela recente
+        (todas as linhas novas e os últimos 'janela_incremental_dias' dias)
+        mais uma amostra de replay das linhas antigas.
+
+        A validação usa apenas linhas que o modelo anterior nunca viu: a
+        fração 'fracao_teste' mais recente (em ordem temporal) das linhas
+        novas, que fica fora do treino incremental. É nela que a proteção
+        contra deriva compara o RMSE com o de referência. O early stopping
+        usa outra fatia das linhas novas (a fração 'fracao_teste' anterior à
+        validação), para que a validação não escolha a melhor iteração; sem
+        linhas novas suficientes para essa fatia, o early stopping é
+        desligado neste ajuste.
+
+        Retorna:
+            tuple(np.ndarray, np.ndarray) | None: índices de treino e validação
+            do armazém (validação vazia quando não há linhas novas e o modelo
+            salvo é reutilizado sem métricas); None quando é necessário o
+            treino completo (sem modelo anterior, colunas diferentes ou RMSE
+            acima da tolerância).
+        """
+        metadados = self.carregue_metadados()
+
+        if self.enumModelo != ModelosEnum.XGBOOST or metadados is None:
+            print("Treino incremental indisponível: sem modelo XGBoost anterior. Executando treino completo.")
+            return None
+
+        if metadados["feature_cols"] != list(self.feature_cols):
+            print("Colunas preditoras mudaram desde o último modelo. Executando treino completo.")
+            return None
+
+        # Os códigos das categorias já vistas pelo booster não podem mudar
+        anteriores = metadados.get("categorias", {})
+        if any(self.categorias.get(coluna, [])[:len(lista)] != lista for coluna, lista in anteriores.items()):
+            print("Dicionário de categorias mudou desde o último modelo. Executando treino completo.")
+            return None
+
+        caminho, _ = self.caminho_modelo()
+        instantes = self.df_dados_treino["din_instante"].to_numpy()
+        ultimo_instante = np.datetime64(pd.Timestamp(metadados["ultimo_instante"]))
+
+        novos = np.flatnonzero(instantes > ultimo_instante)
+        if len(novos) == 0:
+            print("Nenhuma linha nova desde o último treino; reutilizando o modelo salvo.")
+            self.modelo.load_model(caminho)
+            return np.arange(armazem.n_linhas), np.array([], dtype=np.int64)
+
+        # Validação: linhas novas mais recentes, nunca vistas por nenhum modelo
+        novos = novos[np.argsort(instantes[novos], kind="stable")]
+        n_validacao = max(1, int(np.ceil(len(novos) * self.fracao_teste)))
+        idx_test = novos[-n_validacao:]
+
+        # Parada antecipada: linhas novas imediatamente anteriores à validação
+        anteriores_validacao = novos[:-n_validacao]
+        n_parada = int(np.ceil(len(anteriores_validacao) * self.fracao_teste)) if len(anteriores_validacao) > 1 else 0
+        idx_parada = anteriores_validacao[len(anteriores_validacao) - n_parada:]
+
+        inicio_janela = instantes.max() - np.timedelta64(self.janela_incremental_dias, "D")
+        recentes = np.zeros(len(instantes), dtype=bool)
+        recentes[novos] = True
+        recentes |= instantes >= inicio_janela
+
+        rng = np.random.default_rng(self.semente_divisao)
+        antigos = np.flatnonzero(~recentes)
+        recentes[idx_test] = False
+        recentes[idx_parada] = False
+        janela = np.flatnonzero(recentes)
+        replay = rng.choice(antigos, size=min(len(antigos), int(len(janela) * self.fracao_replay)), replace=False)
+
+        idx_train = np.concatenate([janela, replay])
+        X_train, X_test = armazem.X[idx_train], armazem.X[idx_test]
+        y_train, y_test = armazem.y[idx_train], armazem.y[idx_test]
+
+        print(f"Treino incremental: {len(novos)} linhas novas ({len(idx_test)} reservadas para validação, "
+              f"{len(idx_parada)} para early stopping), {len(replay)} de replay")
+
+        # A validação nunca entra no 'eval_set' com early stopping ativo
+        parada_original = self.modelo.early_stopping_rounds
+        if len(idx_parada) > 0:
+            X_parada, y_parada = armazem.X[idx_parada], armazem.y[idx_parada]
+        else:
+            print("Linhas novas insuficientes para early stopping; ajuste incremental sem parada antecipada.")
+            X_parada, y_parada = X_train, y_train
+            self.modelo.set_params(early_stopping_rounds=None)
+
+        self.modelo.set_params(n_estimators=self.rodadas_incrementais)
+        try:
+            with self.reserve_threads("treino incremental"):
+                self.modelo.fit(
+                    X_train, y_train,
+                    eval_set=[(X_train, y_train), (X_parada, y_parada)],
+                    xgb_model=caminho,
+                    verbose=False
+                )
+        finally:
+            self.modelo.set_params(early_stopping_rounds=parada_original)
+        self.gerenciadorDeGraficos.gere_grafico_curva_de_erro(self.modelo.evals_result(), self.tipoDeUsina)
+
+        # --- Proteção contra deriva: compara com o RMSE de referência ---
+        rmse = np.sqrt(mean_squared_error(y_test, self.preveja_matriz(X_test, indices=idx_test)))
+        limite = metadados["rmse_referencia"] * (1 + self.tolerancia_incremental)
+
+        if rmse > limite:
+            print(f"RMSE incremental {rmse:.3f} acima do limite {limite:.3f}. Executando treino completo.")
+            self.modelo = self.novo_modelo()
+            return None
+
+        return idx_train, idx_test
+
+    # ==========================================================
+    # TREINAMENTO PARTICIONADO
+    # ==========================================================
+    def treine_particionado(self, armazem, idx_train, estrategia, n_particoes, processos):
+        """
+        Agrupa as usinas conforme a estratégia informada e treina um modelo
+        menor por partição em um pool de processos.
+
+        Retorna:
+            RoteadorDeModelos: preditor que envia cada linha ao modelo da sua partição.
+        """
+        particionador = ParticionadorDeUsinas(estrategia, n_particoes)
+        self.rotulos_treino = particionador.ajuste(self.df_dados_treino)
+
+        def obtenha_modelo(n_jobs):
+            modelo = self.novo_modelo()
+            if self.enumModelo == ModelosEnum.XGBOOST:
+                modelo.set_params(n_jobs=n_jobs, **self.parametros_xgboost_particao)
+            return modelo
+
+        print(f"Treinamento particionado por {estrategia.value} ({len(particionador.rotulos)} partições)")
+
+        # Processos e threads por processo saem da mesma reserva do orçamento
+        with OrcamentoDeThreads.reserve(f"{self.tipoDeUsina.name.lower()}: treino particionado") as n_threads:
+            return treine_modelos_particionados(
+                obtenha_modelo, armazem, idx_train, self.rotulos_treino,
+                particionador, processos=processos, threads=n_threads
+            )
+
     # ==========================================================
     # VALIDAÇÃO CRUZADA (K-Fold)
     # ==========================================================
-    def realize_validacao_cruzada_kfold(self, X, y, k_fold=5):
+    def realize_validacao_cruzada_kfold(self, X, y, k_fold=5, diretorio_cache=None):
         """
         Executa validação cruzada K-Fold (apenas para XGBoost) e
         exibe o RMSE médio e desvio padrão.
+
+        X e y são os arrays mapeados em memória do armazém de features; os
+        folds são gerados sobre índices e apenas as linhas de cada fold são
+        materializadas para o treino.
+
+        Com 'diretorio_cache', o RMSE de cada fold é gravado junto das
+        matrizes do XGBoost e reaproveitado enquanto os dados, a quantidade
+        de folds e os hiperparâmetros não mudarem.
         """
+        caminho_cache = os.path.join(diretorio_cache, "validacao_cruzada.json") if diretorio_cache else None
+        chave = None
+        if caminho_cache:
+            # 'n_jobs' varia com o orçamento de threads e não altera o resultado
+            parametros = {
+                nome: valor for nome, valor in self.modelo.get_xgb_params().items()
+                if nome not in ("n_jobs", "nthread")
+            }
+            chave = {"k_fold": k_fold, "parametros": parametros}
+
+        if caminho_cache and os.path.exists(caminho_cache):
+            with open(caminho_cache, encoding="utf-8") as arquivo:
+                cache = json.load(arquivo)
+            if cache.get("chave") == json.loads(json.dumps(chave, default=str)):
+                fold_rmse = cache["fold_rmse"]
+                print(f"RMSE médio nos folds (cache): {np.mean(fold_rmse):.3f} ± {np.std(fold_rmse):.3f}")
+                return
+
         kf = KFold(n_splits=k_fold, shuffle=True, random_state=42)
         fold_rmse = []
 
-        for train_index, val_index in kf.split(X):
-            X_train, X_val = X.iloc[train_index], X.iloc[val_index]
-            y_train, y_val = y.iloc[train_index], y.iloc[val_index]
+        for train_index, val_index in kf.split(np.arange(len(y))):
+            X_train, X_val = X[train_index], X[val_index]
+            y_train, y_val = y[train_index], y[val_index]
 
-            self.modelo.fit(
-                X_train, y_train,
-                eval_set=[(X_train, y_train), (X_val, y_val)],
-                verbose=False
-            )
+            with self.reserve_threads("validação cruzada"):
+                self.modelo.fit(
+                    X_train, y_train,
+                    eval_set=[(X_train, y_train), (X_val, y_val)],
+                    verbose=False
+                )
 
             results = self.modelo.evals_result()
             rmse_val = results["validation_1"]["rmse"][-1]
-            fold_rmse.append(rmse_val)
+            fold_rmse.append(float(rmse_val))
 
         print(f"RMSE médio nos folds: {np.mean(fold_rmse):.3f} ± {np.std(fold_rmse):.3f}")
+
+        if caminho_cache:
+            with EscritaAtomica.arquivo(caminho_cache) as caminho_tmp:
+                with open(caminho_tmp, "w", encoding="utf-8") as arquivo:
+                    json.dump({"chave": chave, "fold_rmse": fold_rmse}, arquivo, default=str, indent=2)
@@ -1,4 +1,3 @@
-import pandas as pd
 from scripts.modelos.processador_regressao import ProcessadorDeRegressao
 from scripts.modelos.modelos_regressao import ModelosEnum
 from utils.gerenciador_arquivos import GerenciadorDeArquivos
@@ -11,12 +10,14 @@ class ProcessadorRegressaoUsinaEolica(ProcessadorDeRegressao):
      
     def __init__(self):
        # --- Dados para treino ---
-        GerenciadorDeArquivos.descompacte("dados_treino_usinas_eolicas")
-        df_usinas = pd.read_csv("data/processados/dados_treino_usinas_eolicas.csv")
+        # (lido direto do ZIP, sem extração em disco)
+        caminho_treino = GerenciadorDeArquivos.caminho_origem("dados_treino_usinas_eolicas")
+        # (texto repetido lido como categoria: dicionário + códigos inteiros)
+        categorias = {"estado": "category", "nomeUsina": "category", "classificacao": "category"}
+        df_usinas = GerenciadorDeArquivos.leia_csv("dados_treino_usinas_eolicas", dtype=categorias)
 
         # --- Dados de Goiás para predição---
-        GerenciadorDeArquivos.descompacte("potencial_energia_eolica_goias")
-        df_goias = pd.read_csv("data/processados/potencial_energia_eolica_goias.csv")
+        df_goias = GerenciadorDeArquivos.leia_csv("potencial_energia_eolica_goias", dtype=categorias)
         
         # cria instância do objeto
         super().__init__(modelo_enum=ModelosEnum.XGBOOST,
@@ -24,12 +25,25 @@ class ProcessadorRegressaoUsinaEolica(ProcessadorDeRegressao):
                         df_dados_predicao=df_goias,
                         previsao="fator_capacidade",
                         nome_arquivo="resultado_eolica_xgboost.csv",
-                        tipoDeUsina= TipoDeUsinasEnum.EOLICA)
+                        tipoDeUsina= TipoDeUsinasEnum.EOLICA,
+                        origem_dados_treino=caminho_treino)
         
         # Lista de colunas utilizadas como variáveis preditoras
         self.feature_cols = ['vento_medio_m_s', 'rajada_vento_10m', 'direcao_vento_10m',
                              'altitude_m', 'rugosidade', 'indice_potencial',
                              'ano', 'mes', 'dia', 'hora', 'dia_da_semana']
 
+        # Colunas categóricas expostas ao XGBoost com '--categoricas'
+        self.colunas_categoricas = ['nomeUsina', 'estado', 'classificacao']
+
+        # Histórico recente do vento (lags, rampas e janelas móveis) e
+        # codificações cíclicas de hora, mês e direção do vento
+        self.features_temporais = {
+            "colunas": ['vento_medio_m_s', 'rajada_vento_10m'],
+            "lags": [1, 2, 3],
+            "janelas": [3, 6, 24],
+            "ciclicas": {"hora": 24, "mes": 12, "direcao_vento_10m": 360},
+        }
+
     def processe():
         super().processe_regressao()
\ No newline at end of file
@@ -1,8 +1,8 @@
-import pandas as pd
 from scripts.modelos.processador_regressao import ProcessadorDeRegressao
 from scripts.modelos.modelos_regressao import ModelosEnum
 from utils.gerenciador_arquivos import GerenciadorDeArquivos
 from scripts.modelos.tipos_de_usinas import TipoDeUsinasEnum
+from scripts.processamento.geometria_solar import GeometriaSolar
 
 class ProcessadorRegressaoUsinaSolar(ProcessadorDeRegressao):
     """
@@ -11,12 +11,14 @@ class ProcessadorRegressaoUsinaSolar(ProcessadorDeRegressao):
 
     def __init__(self):
         # --- Dados para treino ---
-        GerenciadorDeArquivos.descompacte("dados_treino_usinas_solares")
-        df_dados_treino = pd.read_csv("data/processados/dados_treino_usinas_solares.csv")
+        # (lido direto do ZIP, sem extração em disco)
+        caminho_treino = GerenciadorDeArquivos.caminho_origem("dados_treino_usinas_solares")
+        # (texto repetido lido como categoria: dicionário + códigos inteiros)
+        categorias = {"estado": "category", "nomeUsina": "category"}
+        df_dados_treino = GerenciadorDeArquivos.leia_csv("dados_treino_usinas_solares", dtype=categorias)
 
         # --- Dados de Goiás ---
-        GerenciadorDeArquivos.descompacte("potencial_energia_solar_goias")
-        df_dados_predicao_goias = pd.read_csv("data/processados/potencial_energia_solar_goias.csv")
+        df_dados_predicao_goias = GerenciadorDeArquivos.leia_csv("potencial_energia_solar_goias", dtype=categorias)
         
         # cria instância do objeto
         super().__init__(modelo_enum=ModelosEnum.XGBOOST,
@@ -24,11 +26,47 @@ class ProcessadorRegressaoUsinaSolar(ProcessadorDeRegressao):
                         df_dados_predicao=df_dados_predicao_goias,
                         previsao="fator_capacidade",
                         nome_arquivo="resultado_solar_xgboost.csv",
-                        tipoDeUsina= TipoDeUsinasEnum.SOLAR)
+                        tipoDeUsina= TipoDeUsinasEnum.SOLAR,
+                        origem_dados_treino=caminho_treino)
        
         # Lista de colunas utilizadas como variáveis preditoras
         self.feature_cols = ['temperatura_C', 'nebulosidade_percentual', 'irradiancia_Wm2',
-                             'altitude_m','ano', 'mes', 'dia', 'hora', 'dia_da_semana']
+                             'altitude_m','ano', 'mes', 'dia', 'hora', 'dia_da_semana',
+                             'elevacao_solar', 'azimute_solar', 'irradiancia_extraterrestre_Wm2',
+                             'ghi_ceu_claro_Wm2', 'indice_ceu_claro']
+
+        # Colunas categóricas expostas ao XGBoost com '--categoricas'
+        self.colunas_categoricas = ['nomeUsina', 'estado']
+
+        # Clima solar consultado no horário de Brasília (ver ProcessadorDadosUsinasSolares.obtenha_clima)
+        self.fuso_horario_dados = "America/Sao_Paulo"
+
+        # Histórico recente de irradiância e nebulosidade (lags, rampas e
+        # janelas móveis) e codificações cíclicas de hora e mês
+        self.features_temporais = {
+            "colunas": ['irradiancia_Wm2', 'nebulosidade_percentual'],
+            "lags": [1, 2, 3],
+            "janelas": [3, 6, 24],
+            "ciclicas": {"hora": 24, "mes": 12},
+        }
+
+    def prepare_data_sets(self):
+        """
+        Complementa a preparação padrão com a geometria solar, calculada a
+        partir das tabelas anuais em cache quando o arquivo de origem foi
+        gerado antes da inclusão dessas colunas.
+        """
+        for df in (self.df_dados_treino, self.df_dados_predicao):
+            if "indice_ceu_claro" not in df.columns:
+                GeometriaSolar.adicione_features(df)
+
+        super().prepare_data_sets()
+
+    def descreva_features_derivadas(self):
+        """ Inclui a versão do cálculo da geometria solar na assinatura do armazém. """
+        descricao = super().descreva_features_derivadas()
+        descricao["geometria_solar"] = {"versao": GeometriaSolar.VERSAO_CALCULO}
+        return descricao
 
     def processe():
         super().processe_regressao()
\ No newline at end of file
@@ -0,0 +1,221 @@
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import ProcessPoolExecutor
+from sklearn.cluster import KMeans
+from sklearn.model_selection import train_test_split
+from xgboost import XGBRegressor
+
+from scripts.modelos.estrategias_de_particao import EstrategiaDeParticaoEnum
+from utils.armazem_de_features import ArmazemDeFeatures
+from utils.orcamento_de_threads import OrcamentoDeThreads
+
+
+# Região geográfica de cada unidade federativa
+REGIAO_POR_ESTADO = {
+    "AC": "Norte", "AM": "Norte", "AP": "Norte", "PA": "Norte",
+    "RO": "Norte", "RR": "Norte", "TO": "Norte",
+    "AL": "Nordeste", "BA": "Nordeste", "CE": "Nordeste", "MA": "Nordeste",
+    "PB": "Nordeste", "PE": "Nordeste", "PI": "Nordeste", "RN": "Nordeste", "SE": "Nordeste",
+    "DF": "Centro-Oeste", "GO": "Centro-Oeste", "MS": "Centro-Oeste", "MT": "Centro-Oeste",
+    "ES": "Sudeste", "MG": "Sudeste", "RJ": "Sudeste", "SP": "Sudeste",
+    "PR": "Sul", "RS": "Sul", "SC": "Sul",
+}
+
+
+class ParticionadorDeUsinas:
+    """
+    Classe responsável por atribuir cada linha (usina/localidade e instante) a
+    uma partição, conforme a estratégia escolhida.
+
+    As partições são aprendidas nos dados de treino ('ajuste') e depois
+    aplicadas a qualquer DataFrame ('rotule'). Linhas cujo rótulo não existe no
+    treino (ex.: outra região ou classe) são enviadas para a partição de
+    centróide (latitude/longitude) mais próximo.
+    """
+
+    def __init__(self, estrategia: EstrategiaDeParticaoEnum, n_particoes=8):
+        self.estrategia = estrategia
+        self.n_particoes = n_particoes
+        self.rotulos = []
+        self.centroides = None
+
+    def ajuste(self, df):
+        """
+        Aprende as partições a partir dos dados de treino.
+
+        Retorna:
+            np.ndarray: rótulo (inteiro) de cada linha de 'df'.
+        """
+        if self.estrategia == EstrategiaDeParticaoEnum.COORDENADAS:
+            coordenadas = df[["latitude", "longitude"]].drop_duplicates().to_numpy()
+            self._kmeans = KMeans(
+                n_clusters=min(self.n_particoes, len(coordenadas)),
+                n_init=10, random_state=42
+            ).fit(coordenadas)
+            self.rotulos = list(range(self._kmeans.n_clusters))
+
+        elif self.estrategia == EstrategiaDeParticaoEnum.ALTITUDE:
+            quantis = np.linspace(0, 1, self.n_particoes + 1)[1:-1]
+            self._limites_altitude = np.unique(np.quantile(df["altitude_m"].to_numpy(), quantis))
+            self.rotulos = list(range(len(self._limites_altitude) + 1))
+
+        else:
+            self.rotulos = sorted(self._categorias(df).dropna().unique().tolist())
+
+        rotulos = self._rotule_conhecidos(df)
+
+        # Centróide geográfico de cada partição (usado para rótulos desconhecidos)
+        coordenadas = df[["latitude", "longitude"]].to_numpy(dtype=np.float64)
+        self.centroides = np.array([
+            coordenadas[rotulos == p].mean(axis=0) if np.any(rotulos == p) else (np.inf, np.inf)
+            for p in range(len(self.rotulos))
+        ])
+
+        return rotulos
+
+    def rotule(self, df):
+        """
+        Retorna o rótulo (inteiro) da partição de cada linha de 'df'.
+        """
+        rotulos = self._rotule_conhecidos(df)
+
+        desconhecidos = rotulos < 0
+        if np.any(desconhecidos):
+            coordenadas = df.loc[desconhecidos, ["latitude", "longitude"]].to_numpy(dtype=np.float64)
+            rotulos[desconhecidos] = self.mais_proxima(coordenadas)
+
+        return rotulos
+
+    def mais_proxima(self, coordenadas, candidatas=None):
+        """
+        Retorna, para cada coordenada, a partição de centróide mais próximo
+        dentre as 'candidatas' (todas, se None).
+        """
+        candidatas = np.arange(len(self.rotulos)) if candidatas is None else np.asarray(candidatas)
+        distancias = ((coordenadas[:, None, :] - self.centroides[candidatas][None, :, :]) ** 2).sum(axis=2)
+        return candidatas[np.argmin(distancias, axis=1)]
+
+    def _categorias(self, df):
+        if self.estrategia == EstrategiaDeParticaoEnum.CLASSIFICACAO:
+            if "classificacao" not in df.columns:
+                raise ValueError("Partição por classificação exige a coluna 'classificacao' (apenas usinas eólicas).")
+            return df["classificacao"].astype(str)
+
+        return df["estado"].astype(str).map(REGIAO_POR_ESTADO)
+
+    def _rotule_conhecidos(self, df):
+        """ Rótulos das linhas; -1 para categorias não vistas no treino. """
+        if self.estrategia == EstrategiaDeParticaoEnum.COORDENADAS:
+            return self._kmeans.predict(df[["latitude", "longitude"]].to_numpy()).astype(np.int64)
+
+        if self.estrategia == EstrategiaDeParticaoEnum.ALTITUDE:
+            return np.searchsorted(self._limites_altitude, df["altitude_m"].to_numpy(), side="right").astype(np.int64)
+
+        codigos = pd.Categorical(self._categorias(df), categories=self.rotulos).codes
+        return codigos.astype(np.int64)
+
+
+class RoteadorDeModelos:
+    """
+    Preditor que encaminha cada linha para o modelo da sua partição.
+
+    Partições sem modelo (poucas linhas no treino) são atendidas pelo modelo
+    da partição treinada de centróide mais próximo.
+    """
+
+    def __init__(self, particionador: ParticionadorDeUsinas, modelos: dict):
+        self.particionador = particionador
+        self.modelos = modelos
+
+        treinadas = sorted(modelos)
+        self.substituta = {
+            p: (p if p in modelos else int(particionador.mais_proxima(
+                particionador.centroides[[p]], treinadas)[0]))
+            for p in range(len(particionador.rotulos))
+        }
+
+    def predict(self, X, rotulos):
+        """
+        Prediz cada linha de X com o modelo da partição indicada em 'rotulos'.
+        """
+        destino = np.array([self.substituta[p] for p in range(len(self.particionador.rotulos))])[rotulos]
+        y_pred = np.empty(len(X), dtype=np.float32)
+
+        for p, modelo in self.modelos.items():
+            linhas = np.flatnonzero(destino == p)
+            if len(linhas):
+                y_pred[linhas] = modelo.predict(X[linhas])
+
+        return y_pred
+
+
+# ==========================================================
+# TREINAMENTO PARALELO DAS PARTIÇÕES
+# ==========================================================
+def _treine_particao(modelo, diretorio_armazem, indices):
+    """
+    Treina o modelo de uma partição em um processo separado. O armazém de
+    features é reaberto via memmap no processo filho (sem cópia via pickle).
+    """
+    armazem = ArmazemDeFeatures(diretorio_armazem)
+    X, y = armazem.X[indices], armazem.y[indices]
+
+    if isinstance(modelo, XGBRegressor):
+        # Pequena separação interna para o early stopping
+        X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.1, random_state=42)
+        modelo.fit(X_train, y_train, eval_set=[(X_val, y_val)], verbose=False)
+    else:
+        modelo.fit(X, y)
+
+    return modelo
+
+
+def treine_modelos_particionados(obtenha_modelo, armazem, indices_treino, rotulos,
+                                 particionador, processos=None, min_linhas=1000, threads=None):
+    """
+    Treina um modelo por partição em paralelo (pool de processos).
+
+    Parâmetros:
+        obtenha_modelo: função sem argumentos que retorna um modelo novo;
+            recebe o número de threads por processo em 'n_jobs'
+        armazem: ArmazemDeFeatures com todas as linhas de treino
+        indices_treino: índices (no armazém) das linhas usadas no treino
+        rotulos: rótulo de partição de cada linha do armazém
+        particionador: ParticionadorDeUsinas já ajustado
+        processos: quantidade de processos (padrão: uma por thread do orçamento)
+        min_linhas: partições com menos linhas não recebem modelo próprio
+        threads: threads disponíveis para todos os processos (padrão: o
+            orçamento do host, ver OrcamentoDeThreads)
+
+    Retorna:
+        RoteadorDeModelos: preditor que encaminha as linhas para cada modelo.
+    """
+    threads = threads or OrcamentoDeThreads.total()
+    processos = min(processos or threads, threads)
+    rotulos_treino = rotulos[indices_treino]
+
+    tarefas = {}
+    for p in range(len(particionador.rotulos)):
+        indices = indices_treino[rotulos_treino == p]
+        if len(indices) >= min_linhas:
+            tarefas[p] = indices
+
+    if not tarefas:
+        raise ValueError("Nenhuma partição possui linhas suficientes para o treinamento.")
+
+    processos = min(processos, len(tarefas))
+    n_jobs = max(1, threads // processos)
+
+    with ProcessPoolExecutor(max_workers=processos, initializer=OrcamentoDeThreads.inicialize_processo,
+                             initargs=(n_jobs,)) as executor:
+        futuros = {
+            p: executor.submit(_treine_particao, obtenha_modelo(n_jobs), armazem.diretorio, indices)
+            for p, indices in tarefas.items()
+        }
+        modelos = {p: futuro.result() for p, futuro in futuros.items()}
+
+    for p, indices in tarefas.items():
+        print(f"Partição {particionador.rotulos[p]}: {len(indices)} linhas de treino")
+
+    return RoteadorDeModelos(particionador, modelos)
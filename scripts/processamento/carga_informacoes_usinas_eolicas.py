@@ -1,11 +1,11 @@
-import requests
 import math
-import geopandas as gpd
-from shapely.geometry import shape, MultiPolygon, Polygon
+import numpy as np
 import pandas as pd
 from datetime import datetime
 from datetime import timezone
-from scripts.integracao.conexao_snow_flake import Conexao
+from scripts.integracao.cliente_open_meteo import ClienteOpenMeteo
+from scripts.processamento.preparacao_em_shards import PreparacaoEmShards
+from scripts.processamento.preparacao_em_pipeline import PreparacaoEmPipeline
 from utils.gerenciador_arquivos import GerenciadorDeArquivos
 
 class ProcessadorDadosUsinasEolicas:
@@ -34,14 +34,17 @@ class ProcessadorDadosUsinasEolicas:
         - altitude (metros)
         indexado por data/hora.
 
+        A janela de datas é a configurada em 'ClienteOpenMeteo' (variáveis
+        OPEN_METEO_DATA_INICIO/OPEN_METEO_DATA_FIM), baixada mês a mês em
+        paralelo e com cache por mês.
+
         Caso haja erro na API, retorna None.
         """
-        url = f"https://archive-api.open-meteo.com/v1/era5?latitude={lat}&longitude={lon}&start_date=2024-01-01&end_date=2025-09-26&hourly=windspeed_10m,windgusts_10m,winddirection_10m"
-
         try:
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json()
+            data = ClienteOpenMeteo.obtenha(
+                "era5", lat, lon,
+                ["windspeed_10m", "windgusts_10m", "winddirection_10m"]
+            )
 
             # Extrai dados horários
             wind_speeds = data.get("hourly", {}).get("windspeed_10m", [])
@@ -134,95 +137,135 @@ class ProcessadorDadosUsinasEolicas:
 
         return ipe, classificacao, rugosidade
 
+    @staticmethod
+    def calcular_potencial_eolico_vetorizado(lat, vento, altitude):
+        """
+        Versão vetorizada (NumPy) de 'calcular_potencial_eolico', com as
+        mesmas regras de rugosidade e classificação, para arrays de células
+        ou instantes (ex.: mapas em grade).
+
+        Retorna:
+            tuple(np.ndarray, np.ndarray, np.ndarray): IPE, classificação
+            (texto) e rugosidade, no formato de 'vento'.
+        """
+        lat, vento, altitude = np.broadcast_arrays(
+            np.asarray(lat, dtype=np.float64), np.asarray(vento, dtype=np.float64),
+            np.asarray(altitude, dtype=np.float64)
+        )
+
+        rugosidade = np.select([np.abs(lat) < 5, lat > 10], [0.2, 0.5], default=0.3)
+        ajuste_altitude = np.log(np.maximum(1 + altitude / 10, 1.01))
+        ipe = (vento ** 3 / np.maximum(rugosidade, 0.1)) * ajuste_altitude
+
+        classificacao = np.select(
+            [ipe >= 5000, ipe >= 2500], ["Alto Potencial", "Médio Potencial"], default="Baixo Potencial"
+        )
+
+        return ipe, classificacao, rugosidade
+
     # ========================================================
     # PREPARAÇÃO DOS DADOS DE TREINO (USINAS EÓLICAS)
     # ========================================================
-    def prepare_os_dados_para_treino_usina_eolica():
+    SQL_TREINO = """
+            SELECT DIN_INSTANTE, ID_ESTADO, NOM_USINA_CONJUNTO, 
+            VAL_FATORCAPACIDADE, VAL_GERACAOPROGRAMADA, 
+            VAL_GERACAOVERIFICADA, VAL_CAPACIDADEINSTALADA,
+            val_latitudesecoletora, val_longitudesecoletora
+            FROM fator_capacidade
+            WHERE nom_tipousina = 'Eólica' {filtro_usinas}
+            ORDER BY NOM_USINA_CONJUNTO, val_latitudesecoletora, val_longitudesecoletora, DIN_INSTANTE
+        """
+
+    def prepare_os_dados_para_treino_usina_eolica(processos=1):
         """
         Extrai os dados das usinas eólicas do Snowflake, consulta as informações
         meteorológicas via API e gera um arquivo CSV consolidado com atributos
         físicos, geográficos e de geração elétrica.
 
+        Com 'processos' > 1, as usinas são divididas em shards processados em
+        paralelo (ver PreparacaoEmShards) e as partes são unidas ao final.
+
         Saída: 'dados_treino_usinas_eolicas.csv'
         """
-        sql = """
-            SELECT DIN_INSTANTE, ID_ESTADO, NOM_USINA_CONJUNTO, 
-            VAL_FATORCAPACIDADE, VAL_GERACAOPROGRAMADA, 
-            VAL_GERACAOVERIFICADA, VAL_CAPACIDADEINSTALADA,
-            val_latitudesecoletora, val_longitudesecoletora
-            FROM fator_capacidade
-            WHERE nom_tipousina = 'Eólica'
-            ORDER BY NOM_USINA_CONJUNTO, val_latitudesecoletora, val_longitudesecoletora, DIN_INSTANTE
+        if processos > 1:
+            PreparacaoEmShards.execute(
+                ProcessadorDadosUsinasEolicas._processe_shard, "Eólica",
+                "dados_treino_usinas_eolicas.csv", processos
+            )
+            return
+
+        caminho = ProcessadorDadosUsinasEolicas.gere_dados_de_treino(
+            GerenciadorDeArquivos.caminho_arquivo("dados_treino_usinas_eolicas.csv")
+        )
+        if caminho is None:
+            print("Nenhuma linha de treino gerada para as usinas eólicas.")
+
+    @staticmethod
+    def _processe_shard(usinas, indice):
+        """ Processa um shard de usinas e grava sua parte do CSV de treino. """
+        return ProcessadorDadosUsinasEolicas.gere_dados_de_treino(
+            GerenciadorDeArquivos.caminho_parte("dados_treino_usinas_eolicas.csv", indice), usinas
+        )
+
+    @staticmethod
+    def gere_dados_de_treino(caminho_saida, usinas=None):
         """
+        Consulta as usinas eólicas (todas ou apenas as de 'usinas'), enriquece
+        cada linha com vento, altitude e potencial eólico e grava o CSV de
+        treino em 'caminho_saida'.
 
-        conexao = Conexao.obtenha()
-        cur = conexao.cursor()
-        batch_size = 10000  
-        dados_treino = []
+        A leitura do banco, o download do vento, a transformação e a escrita
+        rodam em estágios sobrepostos (ver PreparacaoEmPipeline).
 
-        try:
-            cur.execute(sql)
-            colunas = [col[0] for col in cur.description]
-            res_cache = {}  # cache para evitar consultas repetidas na API
-
-            while True:
-                rows = cur.fetchmany(batch_size)
-                if not rows:
-                    break
-
-                for row in rows:
-                    linha_dict = dict(zip(colunas, row))
-                    lat = linha_dict["VAL_LATITUDESECOLETORA"]
-                    lon = linha_dict["VAL_LONGITUDESECOLETORA"]
-
-                    if lat is None or lon is None:
-                        continue 
-                    
-                    coord_key = (lat, lon)
-                    data_hora = linha_dict["DIN_INSTANTE"].replace(tzinfo=timezone.utc)
-
-                    # Consulta os dados de vento (usando cache se disponível)
-                    if coord_key not in res_cache:
-                        res_cache[coord_key] = ProcessadorDadosUsinasEolicas.obtenha_informacoes_vento_altitude(lat, lon)
-                        
-                    dados_lat_lon = res_cache[coord_key]
-                    dados_dia_hora = dados_lat_lon[data_hora]
-
-                    velocidade_vendo_10m = dados_dia_hora["velocidade_vendo_10m"]
-                    rajada_vento_10m = dados_dia_hora["rajada_vento_10m"]
-                    direcao_vento_10m = dados_dia_hora["direcao_vento_10m"]
-                    altitude = dados_dia_hora["altitude_m"]
-                        
-                    # Cálculo do potencial eólico
-                    indice_potencial_eolico, classificacao, rugosidade = ProcessadorDadosUsinasEolicas.calcular_potencial_eolico(lat, lon, velocidade_vendo_10m, altitude)
-                
-                    # Montagem do registro final
-                    informacao_do_dia = {
-                        "estado": linha_dict["ID_ESTADO"],
-                        "nomeUsina": linha_dict["NOM_USINA_CONJUNTO"],
-                        "din_instante": data_hora.strftime('%Y-%m-%d %H:%M:%S'),
-                        "latitude": lat,
-                        "longitude": lon,
-                        "vento_medio_m_s": round(velocidade_vendo_10m, 2),
-                        "rajada_vento_10m": round(rajada_vento_10m, 2),
-                        "direcao_vento_10m": round(direcao_vento_10m, 2),
-                        "altitude_m": altitude,
-                        "rugosidade": rugosidade,
-                        "indice_potencial": round(indice_potencial_eolico, 2),
-                        "classificacao": classificacao,
-                        "fator_capacidade": linha_dict["VAL_FATORCAPACIDADE"],
-                        "geracao_programada": linha_dict["VAL_GERACAOPROGRAMADA"],
-                        "geracao_verificada": linha_dict["VAL_GERACAOVERIFICADA"],
-                        "capacidade_instalada": linha_dict["VAL_CAPACIDADEINSTALADA"],
-                    }
-
-                    dados_treino.append(informacao_do_dia)
-
-            # Gera o arquivo final consolidado
-            GerenciadorDeArquivos().gere_arquivo(dados_treino, "dados_treino_usinas_eolicas.csv")
-
-        finally:
-            cur.close()
+        Retorna:
+            str | None: caminho do CSV (None quando não há linhas).
+        """
+        filtro_usinas, parametros = PreparacaoEmShards.filtro_usinas(usinas)
+
+        return PreparacaoEmPipeline.execute(
+            ProcessadorDadosUsinasEolicas.SQL_TREINO.format(filtro_usinas=filtro_usinas), parametros,
+            ProcessadorDadosUsinasEolicas._clima_da_coordenada,
+            ProcessadorDadosUsinasEolicas._transforme_lote,
+            caminho_saida
+        )
+
+    @staticmethod
+    def _clima_da_coordenada(lat, lon):
+        """ Vento e altitude da coordenada, indexados pelo instante. """
+        return PreparacaoEmPipeline.tabela_de_clima(
+            ProcessadorDadosUsinasEolicas.obtenha_informacoes_vento_altitude(lat, lon)
+        )
+
+    @staticmethod
+    def _transforme_lote(df):
+        """
+        Monta os registros de treino de um lote já unido ao vento (cálculo
+        vetorizado do potencial eólico).
+        """
+        vento = df["velocidade_vendo_10m"].to_numpy(dtype=float)
+        indice_potencial_eolico, classificacao, rugosidade = \
+            ProcessadorDadosUsinasEolicas.calcular_potencial_eolico_vetorizado(
+                df["VAL_LATITUDESECOLETORA"].to_numpy(dtype=float), vento, df["altitude_m"].to_numpy(dtype=float)
+            )
+
+        return pd.DataFrame({
+            "estado": df["ID_ESTADO"].to_numpy(),
+            "nomeUsina": df["NOM_USINA_CONJUNTO"].to_numpy(),
+            "din_instante": df["din_instante"].dt.strftime('%Y-%m-%d %H:%M:%S').to_numpy(),
+            "latitude": df["VAL_LATITUDESECOLETORA"].to_numpy(),
+            "longitude": df["VAL_LONGITUDESECOLETORA"].to_numpy(),
+            "vento_medio_m_s": np.round(vento, 2),
+            "rajada_vento_10m": np.round(df["rajada_vento_10m"].to_numpy(dtype=float), 2),
+            "direcao_vento_10m": np.round(df["direcao_vento_10m"].to_numpy(dtype=float), 2),
+            "altitude_m": df["altitude_m"].to_numpy(),
+            "rugosidade": rugosidade,
+            "indice_potencial": np.round(indice_potencial_eolico, 2),
+            "classificacao": classificacao,
+            "fator_capacidade": df["VAL_FATORCAPACIDADE"].to_numpy(),
+            "geracao_programada": df["VAL_GERACAOPROGRAMADA"].to_numpy(),
+            "geracao_verificada": df["VAL_GERACAOVERIFICADA"].to_numpy(),
+            "capacidade_instalada": df["VAL_CAPACIDADEINSTALADA"].to_numpy(),
+        })
 
     # ========================================================
     # GERA POTENCIAL EÓLICO PARA O ESTADO DE GOIÁS
@@ -235,6 +278,10 @@ class ProcessadorDadosUsinasEolicas:
 
         Saída: 'potencial_energia_eolica_goias.csv'
         """
+        # Pilha geográfica carregada apenas quando necessária
+        import geopandas as gpd
+        from shapely.geometry import shape
+
         # Carrega o GeoJSON dos municípios goianos
         PATH_MUNICIPIOS_GO = "https://raw.githubusercontent.com/tbrugz/geodata-br/master/geojson/geojs-52-mun.json"
         mun_raw = gpd.read_file(PATH_MUNICIPIOS_GO)
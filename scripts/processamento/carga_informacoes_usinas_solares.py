@@ -1,8 +1,9 @@
-import requests
-import geopandas as gpd
-from shapely.geometry import shape, MultiPolygon, Polygon
+import pandas as pd
 from datetime import datetime, timezone
-from scripts.integracao.conexao_snow_flake import Conexao
+from scripts.integracao.cliente_open_meteo import ClienteOpenMeteo
+from scripts.processamento.preparacao_em_shards import PreparacaoEmShards
+from scripts.processamento.preparacao_em_pipeline import PreparacaoEmPipeline
+from scripts.processamento.geometria_solar import GeometriaSolar
 from utils.gerenciador_arquivos import GerenciadorDeArquivos
 
 
@@ -31,28 +32,20 @@ class ProcessadorDadosUsinasSolares:
         Consulta os dados históricos de clima (temperatura, nebulosidade, irradiância)
         para uma coordenada geográfica específica (latitude e longitude).
 
-        Utiliza a API pública Open-Meteo para obter dados horários desde
-        01/01/2024 até 26/09/2025.
+        Utiliza a API pública Open-Meteo para obter dados horários da janela
+        configurada em 'ClienteOpenMeteo' (padrão: 01/01/2024 até 26/09/2025),
+        baixada mês a mês em paralelo e com cache por mês.
 
         Retorna:
             dict: Mapeamento datetime → medições climáticas (temperatura, nebulosidade, etc.)
         """
         try:
-            start_date = "2024-01-01"
-            end_date = "2025-09-26"
-
-            url = (
-                f"https://archive-api.open-meteo.com/v1/archive?"
-                f"latitude={latitude}&longitude={longitude}&"
-                f"start_date={start_date}&end_date={end_date}&"
-                f"hourly=temperature_2m,cloudcover,shortwave_radiation&"
-                f"timezone=America/Sao_Paulo"
+            data = ClienteOpenMeteo.obtenha(
+                "archive", latitude, longitude,
+                ["temperature_2m", "cloudcover", "shortwave_radiation"],
+                fuso_horario="America/Sao_Paulo"
             )
 
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json()
-
             # Extração dos dados relevantes
             temperatures = data.get("hourly", {}).get("temperature_2m", [])
             cloudcover = data.get("hourly", {}).get("cloudcover", [])
@@ -88,83 +81,98 @@ class ProcessadorDadosUsinasSolares:
     # ==========================================================
     # MÉTODO PRINCIPAL: Prepara dados de usinas solares do banco
     # ==========================================================
-    def prepare_os_dados_para_treino_usina_solar():
-        """
-        Extrai dados de geração das usinas solares do banco Snowflake,
-        enriquece com dados climáticos e gera um CSV com as informações
-        consolidadas para treinamento de modelos preditivos.
-        """
-        sql = """
+    SQL_TREINO = """
             SELECT DIN_INSTANTE, ID_ESTADO, NOM_USINA_CONJUNTO, 
                    VAL_FATORCAPACIDADE, VAL_GERACAOPROGRAMADA, 
                    VAL_GERACAOVERIFICADA, VAL_CAPACIDADEINSTALADA,
                    VAL_LATITUDESECOLETORA, VAL_LONGITUDESECOLETORA
             FROM fator_capacidade
-            WHERE nom_tipousina = 'Solar'
+            WHERE nom_tipousina = 'Solar' {filtro_usinas}
             ORDER BY NOM_USINA_CONJUNTO, VAL_LATITUDESECOLETORA, VAL_LONGITUDESECOLETORA, DIN_INSTANTE
         """
 
-        conexao = Conexao.obtenha()
-        cur = conexao.cursor()
-        batch_size = 10000  # Quantidade de linhas por leitura (otimiza memória)
-        dados_treino = []
+    def prepare_os_dados_para_treino_usina_solar(processos=1):
+        """
+        Extrai dados de geração das usinas solares do banco Snowflake,
+        enriquece com dados climáticos e gera um CSV com as informações
+        consolidadas para treinamento de modelos preditivos.
+
+        Com 'processos' > 1, as usinas são divididas em shards processados em
+        paralelo (ver PreparacaoEmShards) e as partes são unidas ao final.
+        """
+        if processos > 1:
+            PreparacaoEmShards.execute(
+                ProcessadorDadosUsinasSolares._processe_shard, "Solar",
+                "dados_treino_usinas_solares.csv", processos
+            )
+            return
+
+        caminho = ProcessadorDadosUsinasSolares.gere_dados_de_treino(
+            GerenciadorDeArquivos.caminho_arquivo("dados_treino_usinas_solares.csv")
+        )
+        if caminho is None:
+            print("Nenhuma linha de treino gerada para as usinas solares.")
 
-        try:
-            cur.execute(sql)
-            colunas = [col[0] for col in cur.description]
-
-            # Cache de coordenadas (evita consultas repetidas à API)
-            res_cache = {}
-
-            while True:
-                rows = cur.fetchmany(batch_size)
-                if not rows:
-                    break
-
-                for row in rows:
-                    linha_dict = dict(zip(colunas, row))
-                    lat = linha_dict["VAL_LATITUDESECOLETORA"]
-                    lon = linha_dict["VAL_LONGITUDESECOLETORA"]
-
-                    if lat is None or lon is None:
-                        continue
-
-                    coord_key = (lat, lon)
-                    data_hora = linha_dict["DIN_INSTANTE"].replace(tzinfo=timezone.utc)
-
-                    # Consulta clima apenas uma vez por coordenada
-                    if coord_key not in res_cache:
-                        res_cache[coord_key] = ProcessadorDadosUsinasSolares.obtenha_clima(lat, lon)
-
-                    dados_lat_lon = res_cache[coord_key]
-                    dados_dia_hora = dados_lat_lon.get(data_hora)
-                    if not dados_dia_hora:
-                        continue
-
-                    # Enriquecimento com clima
-                    informacao_do_dia = {
-                        "estado": linha_dict["ID_ESTADO"],
-                        "nomeUsina": linha_dict["NOM_USINA_CONJUNTO"],
-                        "din_instante": data_hora.strftime('%Y-%m-%d %H:%M:%S'),
-                        "latitude": lat,
-                        "longitude": lon,
-                        "temperatura_C": dados_dia_hora["temperatura_C"],
-                        "nebulosidade_percentual": dados_dia_hora["nebulosidade_%"],
-                        "irradiancia_Wm2": dados_dia_hora["irradiancia_Wm2"],
-                        "altitude_m": dados_dia_hora["altitude_m"],
-                        "fator_capacidade": linha_dict["VAL_FATORCAPACIDADE"],
-                        "geracao_programada": linha_dict["VAL_GERACAOPROGRAMADA"],
-                        "geracao_verificada": linha_dict["VAL_GERACAOVERIFICADA"],
-                        "capacidade_instalada": linha_dict["VAL_CAPACIDADEINSTALADA"],
-                    }
-
-                    dados_treino.append(informacao_do_dia)
-
-            # Gera arquivo CSV consolidado
-            GerenciadorDeArquivos().gere_arquivo(dados_treino, "dados_treino_usinas_solares.csv")
-
-        finally:
-            cur.close()
+    @staticmethod
+    def _processe_shard(usinas, indice):
+        """ Processa um shard de usinas e grava sua parte do CSV de treino. """
+        return ProcessadorDadosUsinasSolares.gere_dados_de_treino(
+            GerenciadorDeArquivos.caminho_parte("dados_treino_usinas_solares.csv", indice), usinas
+        )
+
+    @staticmethod
+    def gere_dados_de_treino(caminho_saida, usinas=None):
+        """
+        Consulta as usinas solares (todas ou apenas as de 'usinas'), enriquece
+        cada linha com os dados climáticos e a geometria solar (elevação,
+        azimute, irradiância extraterrestre e índice de céu claro) e grava o
+        CSV de treino em 'caminho_saida'.
+
+        A leitura do banco, o download do clima, a transformação e a escrita
+        rodam em estágios sobrepostos (ver PreparacaoEmPipeline).
+
+        Retorna:
+            str | None: caminho do CSV (None quando não há linhas).
+        """
+        filtro_usinas, parametros = PreparacaoEmShards.filtro_usinas(usinas)
+
+        return PreparacaoEmPipeline.execute(
+            ProcessadorDadosUsinasSolares.SQL_TREINO.format(filtro_usinas=filtro_usinas), parametros,
+            ProcessadorDadosUsinasSolares._clima_da_coordenada,
+            ProcessadorDadosUsinasSolares._transforme_lote,
+            caminho_saida
+        )
+
+    @staticmethod
+    def _clima_da_coordenada(latitude, longitude):
+        """ Clima da coordenada, indexado pelo instante. """
+        return PreparacaoEmPipeline.tabela_de_clima(
+            ProcessadorDadosUsinasSolares.obtenha_clima(latitude, longitude)
+        )
+
+    @staticmethod
+    def _transforme_lote(df):
+        """
+        Monta os registros de treino de um lote já unido ao clima e acrescenta
+        a geometria solar (vetorizada).
+        """
+        registros = pd.DataFrame({
+            "estado": df["ID_ESTADO"].to_numpy(),
+            "nomeUsina": df["NOM_USINA_CONJUNTO"].to_numpy(),
+            "din_instante": df["din_instante"].dt.strftime('%Y-%m-%d %H:%M:%S').to_numpy(),
+            "latitude": df["VAL_LATITUDESECOLETORA"].to_numpy(),
+            "longitude": df["VAL_LONGITUDESECOLETORA"].to_numpy(),
+            "temperatura_C": df["temperatura_C"].to_numpy(),
+            "nebulosidade_percentual": df["nebulosidade_%"].to_numpy(),
+            "irradiancia_Wm2": df["irradiancia_Wm2"].to_numpy(),
+            "altitude_m": df["altitude_m"].to_numpy(),
+            "fator_capacidade": df["VAL_FATORCAPACIDADE"].to_numpy(),
+            "geracao_programada": df["VAL_GERACAOPROGRAMADA"].to_numpy(),
+            "geracao_verificada": df["VAL_GERACAOVERIFICADA"].to_numpy(),
+            "capacidade_instalada": df["VAL_CAPACIDADEINSTALADA"].to_numpy(),
+        })
+
+        return GeometriaSolar.adicione_features(registros)
 
     # ==========================================================
     # MÉTODO AUXILIAR: Potencial solar dos municípios de Goiás
@@ -177,8 +185,13 @@ class ProcessadorDadosUsinasSolares:
           - Lê o arquivo GeoJSON com os municípios de GO;
           - Calcula o centróide (latitude/longitude) de cada município;
           - Consulta dados climáticos históricos via API;
+          - Acrescenta a geometria solar e o índice de céu claro;
           - Gera um CSV consolidando o potencial solar horário.
         """
+        # Pilha geográfica carregada apenas quando necessária
+        import geopandas as gpd
+        from shapely.geometry import shape
+
         PATH_MUNICIPIOS_GO = "https://raw.githubusercontent.com/tbrugz/geodata-br/master/geojson/geojs-52-mun.json"
         mun_raw = gpd.read_file(PATH_MUNICIPIOS_GO)
         mun_raw['geometry'] = mun_raw['geometry'].apply(shape)
@@ -213,4 +226,5 @@ class ProcessadorDadosUsinasSolares:
                 resultados.append(informacao_do_dia)
 
         # Gera CSV final com o potencial solar
-        GerenciadorDeArquivos().gere_arquivo(resultados, "potencial_energia_solar_goias.csv")
+        df_resultados = GeometriaSolar.adicione_features(pd.DataFrame(resultados))
+        GerenciadorDeArquivos().gere_arquivo(df_resultados, "potencial_energia_solar_goias.csv")
@@ -0,0 +1,158 @@
+import os
+import numpy as np
+import pandas as pd
+
+from scripts.modelos.tipos_de_usinas import TipoDeUsinasEnum
+
+
+class GeradorDeCubos:
+    """
+    Classe responsável por agregar as predições horárias de Goiás em cubos
+    compactos (município × mês × hora do dia), gravados em Parquet, para as
+    análises de zoneamento e sazonalidade.
+
+    Arquivos gerados em 'data/resultados/cubos':
+        - cubo_eolica.parquet / cubo_solar.parquet:
+            média, p10 e p90 do fator de capacidade por município, mês e hora;
+        - complementaridade_solar_eolica.parquet:
+            fator de capacidade solar e eólico lado a lado em cada célula do cubo;
+        - indice_complementaridade.parquet:
+            correlação solar × eólica e redução de variabilidade por município.
+
+    O mês e a hora dos cubos são sempre os do horário local de Goiás
+    ('FUSO_CUBOS'): cada predição é convertida a partir do fuso em que os
+    seus dados de clima foram obtidos, de modo que as células solar e eólica
+    combinadas na complementaridade representem o mesmo instante.
+    """
+
+    DIRETORIO_CUBOS = "data/resultados/cubos"
+
+    CHAVES = ["municipio", "mes", "hora"]
+
+    FUSO_CUBOS = "America/Sao_Paulo"
+
+    @staticmethod
+    def caminho_cubo(tipo_usina: TipoDeUsinasEnum):
+        return os.path.join(GeradorDeCubos.DIRETORIO_CUBOS, f"cubo_{tipo_usina.name.lower()}.parquet")
+
+    # ==========================================================
+    # CUBO POR TIPO DE USINA
+    # ==========================================================
+    @staticmethod
+    def gere_cubo(df, tipo_usina: TipoDeUsinasEnum, previsao="fator_capacidade", fuso_origem="UTC"):
+        """
+        Agrega as predições horárias em município × mês × hora do dia em uma
+        única passagem agrupada (média, p10, p90 e quantidade de horas).
+
+        Parâmetros:
+            df: DataFrame de predição (com 'nomeUsina', 'din_instante' e a previsão)
+            tipo_usina: tipo de usina do cubo
+            previsao: coluna com o fator de capacidade predito
+            fuso_origem: fuso dos horários de 'din_instante' (ex.: 'UTC' para o
+                clima eólico, 'America/Sao_Paulo' para o solar)
+
+        Retorna:
+            pandas.DataFrame: cubo agregado.
+        """
+        instantes = GeradorDeCubos.horario_local(df["din_instante"], fuso_origem)
+
+        base = pd.DataFrame({
+            "municipio": df["nomeUsina"].astype("category"),
+            "mes": instantes.dt.month.astype(np.int8),
+            "hora": instantes.dt.hour.astype(np.int8),
+            "latitude": df["latitude"].astype(np.float32),
+            "longitude": df["longitude"].astype(np.float32),
+            "fc": df[previsao].astype(np.float32),
+        })
+
+        grupos = base.groupby(GeradorDeCubos.CHAVES, observed=True, sort=True)
+        quantis = grupos["fc"].quantile([0.1, 0.9]).unstack()
+
+        cubo = grupos.agg(
+            latitude=("latitude", "first"),
+            longitude=("longitude", "first"),
+            fc_media=("fc", "mean"),
+            horas=("fc", "size"),
+        )
+        cubo["fc_p10"] = quantis[0.1].astype(np.float32)
+        cubo["fc_p90"] = quantis[0.9].astype(np.float32)
+        cubo = cubo.reset_index()
+
+        os.makedirs(GeradorDeCubos.DIRETORIO_CUBOS, exist_ok=True)
+        caminho = GeradorDeCubos.caminho_cubo(tipo_usina)
+        cubo.to_parquet(caminho, index=False)
+        print(f"Cubo gerado em: {caminho}")
+
+        return cubo
+
+    @staticmethod
+    def horario_local(instantes, fuso_origem):
+        """
+        Converte os instantes (no fuso 'fuso_origem') para o fuso dos cubos.
+        Instantes com fuso explícito são convertidos diretamente.
+        """
+        instantes = pd.to_datetime(instantes)
+        if instantes.dt.tz is None:
+            instantes = instantes.dt.tz_localize(fuso_origem, ambiguous=False, nonexistent="shift_forward")
+
+        return instantes.dt.tz_convert(GeradorDeCubos.FUSO_CUBOS)
+
+    # ==========================================================
+    # COMPLEMENTARIDADE SOLAR × EÓLICA
+    # ==========================================================
+    @staticmethod
+    def gere_complementaridade():
+        """
+        Combina os cubos solar e eólico (quando ambos existem) e calcula, por
+        município:
+            - correlação entre os perfis médios (mês × hora) solar e eólico
+              (valores negativos indicam complementaridade);
+            - redução de variabilidade: desvio padrão da soma dividido pela
+              soma dos desvios padrão (quanto menor, maior a complementaridade).
+
+        Retorna:
+            pandas.DataFrame | None: índice por município, ou None se faltar algum cubo.
+        """
+        caminho_solar = GeradorDeCubos.caminho_cubo(TipoDeUsinasEnum.SOLAR)
+        caminho_eolica = GeradorDeCubos.caminho_cubo(TipoDeUsinasEnum.EOLICA)
+
+        if not (os.path.exists(caminho_solar) and os.path.exists(caminho_eolica)):
+            return None
+
+        colunas = GeradorDeCubos.CHAVES + ["fc_media"]
+        solar = pd.read_parquet(caminho_solar, columns=colunas).rename(columns={"fc_media": "fc_solar"})
+        eolica = pd.read_parquet(caminho_eolica, columns=colunas).rename(columns={"fc_media": "fc_eolica"})
+
+        combinado = solar.merge(eolica, on=GeradorDeCubos.CHAVES, how="inner")
+        combinado["fc_combinado"] = combinado["fc_solar"] + combinado["fc_eolica"]
+
+        # Momentos por município (correlação calculada de forma vetorizada)
+        x, y = combinado["fc_solar"], combinado["fc_eolica"]
+        momentos = combinado.assign(xy=x * y, xx=x * x, yy=y * y).groupby(
+            "municipio", observed=True
+        ).agg(
+            mx=("fc_solar", "mean"), my=("fc_eolica", "mean"),
+            mxy=("xy", "mean"), mxx=("xx", "mean"), myy=("yy", "mean"),
+            dp_solar=("fc_solar", "std"), dp_eolica=("fc_eolica", "std"),
+            dp_combinado=("fc_combinado", "std"),
+        )
+
+        covariancia = momentos["mxy"] - momentos["mx"] * momentos["my"]
+        variancia_x = momentos["mxx"] - momentos["mx"] ** 2
+        variancia_y = momentos["myy"] - momentos["my"] ** 2
+
+        indice = pd.DataFrame({
+            "fc_solar_medio": momentos["mx"],
+            "fc_eolica_medio": momentos["my"],
+            "correlacao_solar_eolica": covariancia / np.sqrt(variancia_x * variancia_y),
+            "reducao_variabilidade": momentos["dp_combinado"] / (momentos["dp_solar"] + momentos["dp_eolica"]),
+        }).reset_index()
+
+        combinado.to_parquet(
+            os.path.join(GeradorDeCubos.DIRETORIO_CUBOS, "complementaridade_solar_eolica.parquet"), index=False
+        )
+        caminho_indice = os.path.join(GeradorDeCubos.DIRETORIO_CUBOS, "indice_complementaridade.parquet")
+        indice.to_parquet(caminho_indice, index=False)
+        print(f"Índice de complementaridade gerado em: {caminho_indice}")
+
+        return indice
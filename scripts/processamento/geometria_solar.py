@@ -0,0 +1,172 @@
+import os
+import numpy as np
+import pandas as pd
+
+
+class GeometriaSolar:
+    """
+    Classe responsável pelos cálculos vetorizados (NumPy) de geometria solar:
+    elevação e azimute do sol, irradiância extraterrestre no plano horizontal,
+    irradiância global de céu claro (modelo de Haurwitz) e índice de céu claro.
+
+    Para cada localidade (latitude, longitude) é montada uma tabela anual
+    (dia do ano × hora local) que fica em memória e em cache em disco, sendo
+    reutilizada tanto na preparação dos dados de treino quanto na geração dos
+    dados de Goiás e na regressão.
+
+    As equações seguem as aproximações da NOAA (equação do tempo e declinação
+    em série de Fourier). Os valores horários são avaliados no meio da hora
+    anterior, pois a irradiância do Open-Meteo é a média da hora anterior.
+    """
+
+    DIRETORIO_CACHE = "data/cache/geometria_solar"
+
+    # Incrementada quando o cálculo muda (invalida as tabelas em cache e os
+    # armazéns de features que usam estas colunas)
+    VERSAO_CALCULO = 1
+
+    # Horário de Brasília (os instantes do ONS e do Open-Meteo estão neste fuso)
+    FUSO_HORAS_PADRAO = -3
+
+    CONSTANTE_SOLAR = 1361.0
+
+    COLUNAS = ["elevacao_solar", "azimute_solar", "irradiancia_extraterrestre_Wm2",
+               "ghi_ceu_claro_Wm2", "indice_ceu_claro"]
+
+    _tabelas = {}
+
+    # ==========================================================
+    # CÁLCULOS VETORIZADOS
+    # ==========================================================
+    @staticmethod
+    def posicao_solar(latitude, longitude, dia_do_ano, hora_utc):
+        """
+        Calcula a posição do sol.
+
+        Parâmetros:
+            latitude, longitude: graus (arrays ou escalares)
+            dia_do_ano: 1 a 366
+            hora_utc: hora UTC fracionária (pode passar de 24)
+
+        Retorna:
+            tuple(np.ndarray, np.ndarray, np.ndarray): elevação (graus),
+            azimute (graus, a partir do norte, sentido horário) e cosseno
+            do ângulo zenital.
+        """
+        gama = 2 * np.pi / 365 * (dia_do_ano - 1 + (hora_utc - 12) / 24)
+
+        equacao_tempo = 229.18 * (
+            0.000075 + 0.001868 * np.cos(gama) - 0.032077 * np.sin(gama)
+            - 0.014615 * np.cos(2 * gama) - 0.040849 * np.sin(2 * gama)
+        )
+        declinacao = (
+            0.006918 - 0.399912 * np.cos(gama) + 0.070257 * np.sin(gama)
+            - 0.006758 * np.cos(2 * gama) + 0.000907 * np.sin(2 * gama)
+            - 0.002697 * np.cos(3 * gama) + 0.00148 * np.sin(3 * gama)
+        )
+
+        tempo_solar_verdadeiro = hora_utc * 60 + equacao_tempo + 4 * longitude
+        angulo_horario = np.radians(tempo_solar_verdadeiro / 4 - 180)
+        lat = np.radians(latitude)
+
+        cos_zenite = np.clip(
+            np.sin(lat) * np.sin(declinacao) + np.cos(lat) * np.cos(declinacao) * np.cos(angulo_horario),
+            -1, 1
+        )
+        elevacao = 90 - np.degrees(np.arccos(cos_zenite))
+        azimute = (np.degrees(np.arctan2(
+            np.sin(angulo_horario),
+            np.cos(angulo_horario) * np.sin(lat) - np.tan(declinacao) * np.cos(lat)
+        )) + 180) % 360
+
+        return elevacao, azimute, cos_zenite
+
+    @staticmethod
+    def irradiancia_extraterrestre(dia_do_ano, cos_zenite):
+        """ Irradiância extraterrestre no plano horizontal (W/m²). """
+        excentricidade = 1 + 0.033 * np.cos(2 * np.pi * dia_do_ano / 365)
+        return GeometriaSolar.CONSTANTE_SOLAR * excentricidade * np.maximum(cos_zenite, 0)
+
+    @staticmethod
+    def ghi_ceu_claro(cos_zenite):
+        """ Irradiância global horizontal de céu claro - modelo de Haurwitz (W/m²). """
+        cos_positivo = np.maximum(cos_zenite, 1e-6)
+        return np.where(cos_zenite > 0, 1098 * cos_positivo * np.exp(-0.059 / cos_positivo), 0.0)
+
+    # ==========================================================
+    # TABELAS ANUAIS POR LOCALIDADE
+    # ==========================================================
+    @staticmethod
+    def tabela_anual(latitude, longitude, fuso_horas=FUSO_HORAS_PADRAO):
+        """
+        Retorna a tabela (366 dias × 24 horas locais × 4 grandezas) com
+        elevação, azimute, irradiância extraterrestre e GHI de céu claro.
+        """
+        chave = (round(float(latitude), 4), round(float(longitude), 4), fuso_horas)
+        if chave in GeometriaSolar._tabelas:
+            return GeometriaSolar._tabelas[chave]
+
+        caminho = os.path.join(
+            GeometriaSolar.DIRETORIO_CACHE,
+            f"v{GeometriaSolar.VERSAO_CALCULO}_{chave[0]}_{chave[1]}_{fuso_horas}.npy"
+        )
+        if os.path.exists(caminho):
+            tabela = np.load(caminho)
+        else:
+            dia_do_ano, hora_local = np.meshgrid(np.arange(1, 367), np.arange(24), indexing="ij")
+            hora_utc = hora_local - 0.5 - fuso_horas
+
+            elevacao, azimute, cos_zenite = GeometriaSolar.posicao_solar(chave[0], chave[1], dia_do_ano, hora_utc)
+            tabela = np.stack([
+                elevacao,
+                azimute,
+                GeometriaSolar.irradiancia_extraterrestre(dia_do_ano, cos_zenite),
+                GeometriaSolar.ghi_ceu_claro(cos_zenite),
+            ], axis=-1).astype(np.float32)
+
+            os.makedirs(GeometriaSolar.DIRETORIO_CACHE, exist_ok=True)
+            np.save(caminho, tabela)
+
+        GeometriaSolar._tabelas[chave] = tabela
+        return tabela
+
+    @staticmethod
+    def adicione_features(df, coluna_instante="din_instante", coluna_irradiancia="irradiancia_Wm2",
+                          fuso_horas=FUSO_HORAS_PADRAO):
+        """
+        Acrescenta ao DataFrame (no próprio objeto) as colunas de geometria
+        solar e o índice de céu claro de cada linha (latitude, longitude e
+        instante local), consultando a tabela anual de cada localidade.
+
+        Retorna:
+            pandas.DataFrame: o próprio 'df'.
+        """
+        instantes = pd.to_datetime(df[coluna_instante])
+        dia_do_ano = instantes.dt.dayofyear.to_numpy() - 1
+        hora = instantes.dt.hour.to_numpy()
+
+        codigos, localidades = pd.factorize(pd.MultiIndex.from_arrays([df["latitude"], df["longitude"]]))
+        valores = np.empty((len(df), 4), dtype=np.float32)
+
+        # Agrupa as linhas por localidade com uma única ordenação
+        ordem = np.argsort(codigos, kind="stable")
+        limites = np.r_[0, np.cumsum(np.bincount(codigos, minlength=len(localidades)))]
+
+        for i, (latitude, longitude) in enumerate(localidades):
+            linhas = ordem[limites[i]:limites[i + 1]]
+            tabela = GeometriaSolar.tabela_anual(latitude, longitude, fuso_horas)
+            valores[linhas] = tabela[dia_do_ano[linhas], hora[linhas]]
+
+        df["elevacao_solar"] = valores[:, 0]
+        df["azimute_solar"] = valores[:, 1]
+        df["irradiancia_extraterrestre_Wm2"] = valores[:, 2]
+        df["ghi_ceu_claro_Wm2"] = valores[:, 3]
+
+        # Índice de céu claro (0 quando o sol está praticamente abaixo do horizonte)
+        ghi_cc = valores[:, 3]
+        irradiancia = df[coluna_irradiancia].to_numpy(dtype=np.float32)
+        df["indice_ceu_claro"] = np.where(
+            ghi_cc > 10, np.clip(irradiancia / np.maximum(ghi_cc, 10), 0, 1.5), 0
+        ).astype(np.float32)
+
+        return df
@@ -0,0 +1,308 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+
+from scripts.integracao.cliente_open_meteo import ClienteOpenMeteo
+from scripts.modelos.features_temporais import GeradorDeFeaturesTemporais
+from scripts.modelos.modelos_regressao import ModelosEnum
+from scripts.modelos.processador_regressao import ProcessadorDeRegressao
+from scripts.modelos.tipos_de_usinas import TipoDeUsinasEnum
+from scripts.processamento.carga_informacoes_usinas_eolicas import ProcessadorDadosUsinasEolicas
+from utils.armazem_de_features import ArmazemDeFeatures
+from utils.escrita_atomica import EscritaAtomica
+from utils.orcamento_de_threads import OrcamentoDeThreads
+
+
+class GeradorDeMapaRasterGoias:
+    """
+    Classe responsável por gerar mapas em grade (raster) do potencial eólico
+    e do fator de capacidade previsto para o estado de Goiás.
+
+    O clima é baixado uma única vez na grade de origem do ERA5 (0,25°) que
+    cobre o retângulo envolvente do estado e interpolado (bilinear,
+    vetorizado) para a grade fina escolhida. Em seguida, o potencial eólico
+    e o último modelo salvo pela regressão eólica são aplicados a blocos de
+    células consecutivas, e cada bloco (células x instantes) é gravado como
+    um trecho contíguo dos arrays de saída.
+
+    Estrutura da saída:
+        data/resultados/raster/eolica_<resolucao>/
+            vento_medio_m_s.npy    # (latitudes x longitudes x instantes), float32
+            indice_potencial.npy   # idem
+            fator_capacidade.npy   # idem (predição do modelo)
+            metadados.json         # eixos (latitudes crescentes, longitudes,
+                                   # instantes), resolução, células por bloco
+                                   # e modelo usado
+
+    Os arrays podem ser abertos sem cópia com 'np.load(caminho, mmap_mode="r")'.
+    A série temporal de uma célula ('array[i_lat, i_lon]') é contígua em
+    disco; o mapa de um instante é 'array[..., i_instante]'.
+
+    Exemplo de uso:
+        python main.py raster-eolica-goias --resolucao 0.05
+    """
+
+    # Retângulo envolvente de Goiás (graus)
+    LATITUDE_MIN, LATITUDE_MAX = -19.50, -12.39
+    LONGITUDE_MIN, LONGITUDE_MAX = -53.25, -45.90
+
+    # Espaçamento da grade de origem (ERA5)
+    RESOLUCAO_ORIGEM = 0.25
+
+    DIRETORIO_SAIDA = "data/resultados/raster"
+
+    VARIAVEIS = ["windspeed_10m", "windgusts_10m", "winddirection_10m"]
+
+    # ==========================================================
+    # EXECUÇÃO
+    # ==========================================================
+    @staticmethod
+    def gere(resolucao=0.1, celulas_por_bloco=64):
+        """
+        Gera o mapa em grade com a resolução informada.
+
+        Parâmetros:
+            resolucao: espaçamento da grade fina (graus)
+            celulas_por_bloco: células processadas (features e predição) por vez
+
+        Retorna:
+            str: diretório da saída.
+        """
+        modelo, metadados = ProcessadorDeRegressao.carregue_modelo_salvo(TipoDeUsinasEnum.EOLICA, ModelosEnum.XGBOOST)
+
+        lat_origem, lon_origem = GeradorDeMapaRasterGoias.grade(GeradorDeMapaRasterGoias.RESOLUCAO_ORIGEM, margem=True)
+        instantes, clima, altitude = GeradorDeMapaRasterGoias.baixe_grade_origem(lat_origem, lon_origem)
+
+        lat_fina, lon_fina = GeradorDeMapaRasterGoias.grade(resolucao)
+        n_instantes, n_lat, n_lon = len(instantes), len(lat_fina), len(lon_fina)
+        print(f"Grade fina: {n_lat} x {n_lon} células, {n_instantes} instantes")
+
+        diretorio = os.path.join(GeradorDeMapaRasterGoias.DIRETORIO_SAIDA, f"eolica_{resolucao:g}")
+        with EscritaAtomica.diretorio(diretorio) as diretorio_tmp:
+            saidas = {
+                nome: np.lib.format.open_memmap(
+                    os.path.join(diretorio_tmp, f"{nome}.npy"), mode="w+",
+                    dtype=np.float32, shape=(n_lat, n_lon, n_instantes)
+                )
+                for nome in ["vento_medio_m_s", "indice_potencial", "fator_capacidade"]
+            }
+
+            # Pesos da interpolação de cada eixo (calculados uma única vez)
+            eixo_lat = GeradorDeMapaRasterGoias.pesos_bilineares(lat_origem, lat_fina)
+            eixo_lon = GeradorDeMapaRasterGoias.pesos_bilineares(lon_origem, lon_fina)
+
+            celulas = np.arange(n_lat * n_lon)
+            for inicio in range(0, len(celulas), celulas_por_bloco):
+                bloco = celulas[inicio:inicio + celulas_por_bloco]
+                i_lat, i_lon = np.divmod(bloco, n_lon)
+
+                valores = GeradorDeMapaRasterGoias.processe_bloco(
+                    modelo, metadados, instantes, clima, altitude,
+                    lat_fina[i_lat], lon_fina[i_lon],
+                    tuple(eixo[i_lat] for eixo in eixo_lat), tuple(eixo[i_lon] for eixo in eixo_lon)
+                )
+                # Células em ordem (latitude, longitude): o bloco é um trecho contíguo
+                for nome, saida in saidas.items():
+                    saida.reshape(-1, n_instantes)[bloco[0]:bloco[-1] + 1] = valores[nome].T
+
+                print(f"Células processadas: {min(inicio + celulas_por_bloco, len(celulas))}/{len(celulas)}")
+
+            for saida in saidas.values():
+                saida.flush()
+            del saidas
+
+            metadados_saida = {
+                "resolucao_graus": resolucao,
+                "latitudes": lat_fina.round(6).tolist(),
+                "longitudes": lon_fina.round(6).tolist(),
+                "instantes": [str(instante) for instante in instantes],
+                "forma": [n_lat, n_lon, n_instantes],
+                "eixos": ["latitude", "longitude", "instante"],
+                "celulas_por_bloco": celulas_por_bloco,
+                "dtype": "float32",
+                "interpolacao": "bilinear",
+                "resolucao_origem_graus": GeradorDeMapaRasterGoias.RESOLUCAO_ORIGEM,
+                "modelo": ProcessadorDeRegressao.caminhos_do_modelo(TipoDeUsinasEnum.EOLICA, ModelosEnum.XGBOOST)[0],
+            }
+            with open(os.path.join(diretorio_tmp, "metadados.json"), "w", encoding="utf-8") as arquivo:
+                json.dump(metadados_saida, arquivo, ensure_ascii=False, indent=2)
+
+        print(f"Mapa em grade gerado em: {diretorio}")
+        return diretorio
+
+    # ==========================================================
+    # GRADES E INTERPOLAÇÃO
+    # ==========================================================
+    @staticmethod
+    def grade(resolucao, margem=False):
+        """
+        Retorna os eixos (latitudes e longitudes crescentes) da grade com o
+        espaçamento informado sobre o retângulo de Goiás. Com 'margem', os
+        eixos são alinhados a múltiplos da resolução e cobrem todo o
+        retângulo (necessário para interpolar nas bordas).
+        """
+        def eixo(minimo, maximo):
+            if margem:
+                minimo = np.floor(minimo / resolucao) * resolucao
+                maximo = np.ceil(maximo / resolucao) * resolucao
+            quantidade = int(round((maximo - minimo) / resolucao)) + 1
+            return minimo + resolucao * np.arange(quantidade)
+
+        return (
+            eixo(GeradorDeMapaRasterGoias.LATITUDE_MIN, GeradorDeMapaRasterGoias.LATITUDE_MAX),
+            eixo(GeradorDeMapaRasterGoias.LONGITUDE_MIN, GeradorDeMapaRasterGoias.LONGITUDE_MAX),
+        )
+
+    @staticmethod
+    def pesos_bilineares(eixo_origem, eixo_destino):
+        """
+        Para cada ponto do eixo de destino, retorna o índice do vizinho
+        inferior no eixo de origem e o peso do vizinho superior.
+
+        Retorna:
+            tuple(np.ndarray, np.ndarray): índices inferiores e pesos (0 a 1).
+        """
+        indices = np.clip(np.searchsorted(eixo_origem, eixo_destino, side="right") - 1, 0, len(eixo_origem) - 2)
+        pesos = (eixo_destino - eixo_origem[indices]) / (eixo_origem[indices + 1] - eixo_origem[indices])
+        return indices, np.clip(pesos, 0, 1)
+
+    @staticmethod
+    def interpole(campo, eixo_lat, eixo_lon):
+        """
+        Interpolação bilinear de um campo (..., latitudes, longitudes) da
+        grade de origem para uma lista de células.
+
+        Parâmetros:
+            campo: array com as duas últimas dimensões na grade de origem
+            eixo_lat, eixo_lon: (índices, pesos) de cada célula em cada eixo
+
+        Retorna:
+            np.ndarray: array (..., células).
+        """
+        (i, wy), (j, wx) = eixo_lat, eixo_lon
+        return (
+            campo[..., i, j] * (1 - wy) * (1 - wx)
+            + campo[..., i + 1, j] * wy * (1 - wx)
+            + campo[..., i, j + 1] * (1 - wy) * wx
+            + campo[..., i + 1, j + 1] * wy * wx
+        )
+
+    # ==========================================================
+    # CLIMA NA GRADE DE ORIGEM
+    # ==========================================================
+    @staticmethod
+    def baixe_grade_origem(latitudes, longitudes):
+        """
+        Consulta o Open-Meteo (ERA5) em cada ponto da grade de origem (com o
+        cache mensal do ClienteOpenMeteo).
+
+        Retorna:
+            tuple: instantes (datetime64), dicionário de campos
+            (instantes x latitudes x longitudes, float32) com velocidade,
+            rajada e componentes u/v do vento, e altitude (latitudes x longitudes).
+        """
+        n_lat, n_lon = len(latitudes), len(longitudes)
+        print(f"Baixando clima na grade de origem: {n_lat} x {n_lon} pontos")
+
+        instantes = None
+        campos = {}
+        altitude = np.empty((n_lat, n_lon), dtype=np.float32)
+
+        for i, lat in enumerate(latitudes):
+            for j, lon in enumerate(longitudes):
+                data = ClienteOpenMeteo.obtenha("era5", round(float(lat), 4), round(float(lon), 4),
+                                                GeradorDeMapaRasterGoias.VARIAVEIS)
+                hourly = data["hourly"]
+
+                if instantes is None:
+                    instantes = np.array(hourly["time"], dtype="datetime64[s]")
+                    campos = {
+                        nome: np.full((len(instantes), n_lat, n_lon), np.nan, dtype=np.float32)
+                        for nome in ["vento", "rajada", "u", "v"]
+                    }
+
+                def serie(nome):
+                    return np.array([np.nan if valor is None else valor for valor in hourly[nome]], dtype=np.float32)
+
+                vento = serie("windspeed_10m")
+                direcao = np.radians(serie("winddirection_10m"))
+
+                campos["vento"][:, i, j] = vento
+                campos["rajada"][:, i, j] = serie("windgusts_10m")
+                # Direção interpolada pelas componentes (evita a descontinuidade em 0°/360°)
+                campos["u"][:, i, j] = -vento * np.sin(direcao)
+                campos["v"][:, i, j] = -vento * np.cos(direcao)
+                altitude[i, j] = data["elevation"] if data["elevation"] is not None else np.nan
+
+            print(f"Linhas da grade de origem baixadas: {i + 1}/{n_lat}")
+
+        return instantes, campos, altitude
+
+    # ==========================================================
+    # POTENCIAL E PREDIÇÃO POR BLOCO DE CÉLULAS
+    # ==========================================================
+    @staticmethod
+    def processe_bloco(modelo, metadados, instantes, clima, altitude, latitudes, longitudes, eixo_lat, eixo_lon):
+        """
+        Interpola o clima para as células do bloco, calcula o potencial
+        eólico e aplica o modelo.
+
+        Retorna:
+            dict: arrays (instantes x células) 'vento_medio_m_s',
+            'indice_potencial' e 'fator_capacidade'.
+        """
+        n_instantes, n_celulas = len(instantes), len(latitudes)
+
+        vento = GeradorDeMapaRasterGoias.interpole(clima["vento"], eixo_lat, eixo_lon)
+        rajada = GeradorDeMapaRasterGoias.interpole(clima["rajada"], eixo_lat, eixo_lon)
+        u = GeradorDeMapaRasterGoias.interpole(clima["u"], eixo_lat, eixo_lon)
+        v = GeradorDeMapaRasterGoias.interpole(clima["v"], eixo_lat, eixo_lon)
+        direcao = np.degrees(np.arctan2(-u, -v)) % 360
+        altitude_celulas = GeradorDeMapaRasterGoias.interpole(altitude, eixo_lat, eixo_lon)
+
+        ipe, classificacao, rugosidade = ProcessadorDadosUsinasEolicas.calcular_potencial_eolico_vetorizado(
+            latitudes, vento, altitude_celulas
+        )
+
+        # Mesmo formato (longo) e arredondamento dos dados de Goiás por município
+        calendario = pd.DatetimeIndex(instantes)
+        df = pd.DataFrame({
+            "celula": np.repeat(np.arange(n_celulas), n_instantes),
+            "din_instante": np.tile(instantes, n_celulas),
+            "latitude": np.repeat(latitudes, n_instantes),
+            "longitude": np.repeat(longitudes, n_instantes),
+            "vento_medio_m_s": np.round(vento.T.ravel(), 2),
+            "rajada_vento_10m": np.round(rajada.T.ravel(), 2),
+            "direcao_vento_10m": np.round(direcao.T.ravel(), 2),
+            "altitude_m": np.repeat(altitude_celulas, n_instantes),
+            "rugosidade": np.broadcast_to(rugosidade, vento.shape).T.ravel(),
+            "indice_potencial": np.round(ipe.T.ravel(), 2),
+            "classificacao": classificacao.T.ravel(),
+            "estado": "GO",
+            "nomeUsina": None,
+            "ano": np.tile(calendario.year, n_celulas),
+            "mes": np.tile(calendario.month, n_celulas),
+            "dia": np.tile(calendario.day, n_celulas),
+            "hora": np.tile(calendario.hour, n_celulas),
+            "dia_da_semana": np.tile(calendario.weekday, n_celulas),
+        })
+
+        if metadados.get("features_temporais"):
+            features = GeradorDeFeaturesTemporais.gere(
+                df, metadados["features_temporais"], grupo="celula", com_cache=False
+            )
+            for coluna in features.columns:
+                df[coluna] = features[coluna].to_numpy()
+
+        # Categorias codificadas com o dicionário do treino (não vistas = ausentes)
+        X = ArmazemDeFeatures.matriz(df, metadados["feature_cols"], categorias=metadados.get("categorias"))
+        with OrcamentoDeThreads.reserve("raster: predição") as n_threads:
+            modelo.set_params(n_jobs=n_threads)
+            predicao = np.maximum(modelo.predict(X), 0)
+
+        return {
+            "vento_medio_m_s": vento,
+            "indice_potencial": ipe,
+            "fator_capacidade": predicao.reshape(n_celulas, n_instantes).T,
+        }
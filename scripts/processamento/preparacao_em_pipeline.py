@@ -0,0 +1,153 @@
+import pandas as pd
+
+from concurrent.futures import ThreadPoolExecutor
+from scripts.integracao.conexao_snow_flake import Conexao
+from utils.escrita_atomica import EscritaAtomica
+from utils.pipeline_em_estagios import PipelineEmEstagios
+
+
+class PreparacaoEmPipeline:
+    """
+    Classe responsável por executar a preparação dos dados de treino em
+    estágios sobrepostos (ver PipelineEmEstagios):
+
+        leitura      -> lotes de 'fetchmany' da consulta ao banco
+        pré-busca    -> dispara, em segundo plano, o download do clima das
+                        coordenadas que aparecem nos lotes à frente
+        transformação-> junta o clima ao lote e calcula as features (vetorizado)
+        escrita      -> acrescenta o lote ao CSV de saída
+
+    Enquanto um lote é transformado, os seguintes já estão sendo lidos do
+    banco e o clima das próximas usinas já está sendo baixado; o CSV é
+    escrito aos poucos, sem acumular todas as linhas em memória.
+    """
+
+    TAMANHO_LOTE = 10000
+    TAMANHO_FILA = 4
+
+    # Downloads de clima simultâneos (cada um reserva as suas threads HTTP
+    # no orçamento do host, ver ClienteOpenMeteo)
+    DOWNLOADS_SIMULTANEOS = 2
+
+    COLUNA_LATITUDE = "VAL_LATITUDESECOLETORA"
+    COLUNA_LONGITUDE = "VAL_LONGITUDESECOLETORA"
+
+    @staticmethod
+    def execute(sql, parametros, obtenha_clima, transforme, caminho_saida):
+        """
+        Executa a consulta e grava o resultado transformado em 'caminho_saida'.
+
+        Parâmetros:
+            sql, parametros: consulta ao banco (parâmetros no estilo '%s')
+            obtenha_clima: função (lat, lon) -> DataFrame indexado pelo
+                instante (sem fuso) ou None quando não há dados
+            transforme: função (DataFrame do lote com o clima) -> DataFrame final
+            caminho_saida: CSV gerado
+
+        Retorna:
+            str | None: caminho do CSV (None quando nenhuma linha foi gerada).
+        """
+        conexao = Conexao.obtenha()
+        cur = conexao.cursor()
+
+        futuros = {}
+        escrita = {"linhas": 0}
+
+        try:
+            # Sem linhas, nada é gravado e um CSV anterior é mantido
+            with EscritaAtomica.arquivo(caminho_saida) as caminho_tmp:
+                cur.execute(sql, parametros or None)
+                colunas = [col[0] for col in cur.description]
+                i_lat, i_lon = colunas.index(PreparacaoEmPipeline.COLUNA_LATITUDE), \
+                    colunas.index(PreparacaoEmPipeline.COLUNA_LONGITUDE)
+
+                def leia():
+                    while True:
+                        rows = cur.fetchmany(PreparacaoEmPipeline.TAMANHO_LOTE)
+                        if not rows:
+                            return
+                        yield rows
+
+                with ThreadPoolExecutor(max_workers=PreparacaoEmPipeline.DOWNLOADS_SIMULTANEOS,
+                                        thread_name_prefix="clima") as executor:
+
+                    def pre_busque(rows):
+                        # Cada coordenada é baixada uma única vez (cache da execução)
+                        for coordenada in {(row[i_lat], row[i_lon]) for row in rows}:
+                            if None not in coordenada and coordenada not in futuros:
+                                futuros[coordenada] = executor.submit(obtenha_clima, *coordenada)
+                        return rows
+
+                    def transforme_lote(rows):
+                        df = pd.DataFrame(rows, columns=colunas)
+                        df = PreparacaoEmPipeline.junte_clima(df, futuros)
+                        return transforme(df) if len(df) else None
+
+                    def escreva(df):
+                        df.to_csv(caminho_tmp, mode="w" if escrita["linhas"] == 0 else "a",
+                                  header=escrita["linhas"] == 0, index=False)
+                        escrita["linhas"] += len(df)
+
+                    PipelineEmEstagios(PreparacaoEmPipeline.TAMANHO_FILA).execute(
+                        ("leitura", leia()),
+                        [("pré-busca clima", pre_busque), ("transformação", transforme_lote), ("escrita", escreva)]
+                    )
+        finally:
+            cur.close()
+
+        if escrita["linhas"] == 0:
+            return None
+
+        print(f"CSV gerado em: {caminho_saida} ({escrita['linhas']} linhas)")
+        return caminho_saida
+
+    @staticmethod
+    def junte_clima(df, futuros):
+        """
+        Acrescenta ao lote as colunas de clima da coordenada e do instante de
+        cada linha; linhas sem coordenada ou sem clima no instante são
+        descartadas. A ordem original das linhas é mantida.
+
+        Retorna:
+            pandas.DataFrame: lote com a coluna 'din_instante' (datetime, sem
+            fuso) e as colunas de clima.
+        """
+        df = df.dropna(subset=[PreparacaoEmPipeline.COLUNA_LATITUDE, PreparacaoEmPipeline.COLUNA_LONGITUDE])
+        if df.empty:
+            return df
+
+        instantes = pd.to_datetime(df["DIN_INSTANTE"])
+        if instantes.dt.tz is not None:
+            instantes = instantes.dt.tz_localize(None)
+        df = df.assign(din_instante=instantes)
+
+        partes = []
+        for coordenada, grupo in df.groupby(
+            [PreparacaoEmPipeline.COLUNA_LATITUDE, PreparacaoEmPipeline.COLUNA_LONGITUDE], sort=False
+        ):
+            clima = futuros[coordenada].result()
+            if clima is None or clima.empty:
+                continue
+
+            valores = clima.reindex(grupo["din_instante"].to_numpy())
+            valores.index = grupo.index
+            partes.append(grupo.join(valores).dropna(subset=list(clima.columns)))
+
+        if not partes:
+            return df.iloc[0:0]
+
+        return pd.concat(partes).sort_index()
+
+    @staticmethod
+    def tabela_de_clima(resultado):
+        """
+        Converte o dicionário {datetime: medições} dos métodos de clima em um
+        DataFrame indexado pelo instante sem fuso (None se não houver dados).
+        """
+        if not resultado:
+            return None
+
+        clima = pd.DataFrame.from_dict(resultado, orient="index")
+        indice = pd.DatetimeIndex(clima.index)
+        clima.index = indice.tz_localize(None) if indice.tz is not None else indice
+        return clima[~clima.index.duplicated()]
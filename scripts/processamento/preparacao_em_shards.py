@@ -0,0 +1,102 @@
+import numpy as np
+
+from concurrent.futures import ProcessPoolExecutor
+from scripts.integracao.conexao_snow_flake import Conexao
+from utils.gerenciador_arquivos import GerenciadorDeArquivos
+from utils.orcamento_de_threads import OrcamentoDeThreads
+
+
+class PreparacaoEmShards:
+    """
+    Classe responsável por dividir a preparação dos dados de treino por usina
+    e executá-la em um pool de processos.
+
+    As usinas são independentes entre si (consulta, clima e cálculo do
+    potencial), portanto cada processo recebe um grupo contíguo de usinas
+    (em ordem alfabética, balanceado pela quantidade de linhas), grava sua
+    parte em CSV e, ao final, as partes são unidas em um único arquivo na
+    mesma ordem da consulta original.
+
+    Os processos saem do orçamento de threads do host (OrcamentoDeThreads) e
+    cada processo recebe a sua fração, usada pelas consultas ao Open-Meteo.
+    """
+
+    SQL_CONTAGEM = """
+        SELECT NOM_USINA_CONJUNTO, COUNT(*)
+        FROM fator_capacidade
+        WHERE nom_tipousina = %s
+        GROUP BY NOM_USINA_CONJUNTO
+        ORDER BY NOM_USINA_CONJUNTO
+    """
+
+    @staticmethod
+    def obtenha_contagem_por_usina(tipo_usina):
+        """
+        Retorna a lista [(usina, quantidade de linhas)] do tipo informado
+        ('Eólica' ou 'Solar'), em ordem alfabética.
+        """
+        conexao = Conexao.obtenha()
+        cur = conexao.cursor()
+        try:
+            cur.execute(PreparacaoEmShards.SQL_CONTAGEM, (tipo_usina,))
+            return [(usina, int(quantidade)) for usina, quantidade in cur.fetchall()]
+        finally:
+            cur.close()
+
+    @staticmethod
+    def divida_em_shards(contagens, n_shards):
+        """
+        Divide a lista ordenada de usinas em até 'n_shards' grupos contíguos
+        com quantidades de linhas semelhantes.
+
+        Retorna:
+            list[list[str]]: usinas de cada shard (shards vazios são descartados).
+        """
+        if not contagens:
+            return []
+
+        acumulado = np.cumsum([quantidade for _, quantidade in contagens])
+        limites = acumulado[-1] * np.arange(1, n_shards) / n_shards
+        cortes = np.searchsorted(acumulado, limites, side="left") + 1
+
+        shards = np.split(np.array([usina for usina, _ in contagens], dtype=object), cortes)
+        return [list(shard) for shard in shards if len(shard)]
+
+    @staticmethod
+    def filtro_usinas(usinas):
+        """
+        Retorna o trecho SQL 'AND NOM_USINA_CONJUNTO IN (...)' e os parâmetros
+        correspondentes (vazio quando 'usinas' é None).
+        """
+        if usinas is None:
+            return "", ()
+
+        marcadores = ", ".join(["%s"] * len(usinas))
+        return f"AND NOM_USINA_CONJUNTO IN ({marcadores})", tuple(usinas)
+
+    @staticmethod
+    def execute(processe_shard, tipo_usina, nome_arquivo, processos=None):
+        """
+        Executa 'processe_shard(usinas, indice)' para cada shard em um pool de
+        processos e une as partes geradas em 'data/processados/{nome_arquivo}'.
+
+        Parâmetros:
+            processe_shard: função (nível de módulo/classe) que processa as
+                usinas do shard e retorna o caminho da parte gerada (ou None)
+            tipo_usina: valor de 'nom_tipousina' ('Eólica' ou 'Solar')
+            nome_arquivo: nome do CSV final
+            processos: quantidade de processos (padrão: o orçamento de threads)
+        """
+        contagens = PreparacaoEmShards.obtenha_contagem_por_usina(tipo_usina)
+
+        with OrcamentoDeThreads.reserve("preparação em shards", desejado=processos,
+                                        limitar_blas=False) as n_threads:
+            shards = PreparacaoEmShards.divida_em_shards(contagens, n_threads)
+            print(f"Preparação em {len(shards)} shards ({n_threads} processos)")
+
+            with ProcessPoolExecutor(max_workers=max(1, len(shards)),
+                                     initializer=OrcamentoDeThreads.inicialize_processo,
+                                     initargs=(max(1, n_threads // max(1, len(shards))),)) as executor:
+                partes = list(executor.map(processe_shard, shards, range(len(shards))))
+
+        GerenciadorDeArquivos.junte_partes([parte for parte in partes if parte], nome_arquivo)
@@ -1,45 +1,157 @@
-import matplotlib.pyplot as plt
 import os
+import numpy as np
+
+from concurrent.futures import ThreadPoolExecutor
+from utils.orcamento_de_threads import OrcamentoDeThreads
+
 
 class GerenciadorDeGraficos:
-    
+    """
+    Classe responsável por gerar os gráficos do processamento da regressão.
+
+    A renderização é feita em segundo plano (uma thread dedicada, backend 'Agg'),
+    sem bloquear o treinamento. Cada figura é liberada logo após ser salva.
+    Use 'aguarde()' antes de encerrar o processo para garantir que todos os
+    gráficos pendentes foram gravados.
+
+    Cada renderização reserva uma thread do orçamento do host
+    (OrcamentoDeThreads), aguardando enquanto o treino ocupa todas.
+
+    O matplotlib só é importado na primeira renderização.
+    """
+
+    # Quantidade máxima de pontos desenhados em cada curva de erro
+    MAX_PONTOS_CURVA = 1000
+
+    # Resolução da grade de agregação (hexbin) do gráfico predito vs real
+    TAMANHO_GRADE_HEXBIN = 80
+
     def __init__(self, enumModelo):
         self.enumModelo = enumModelo
         self.output_dir = os.path.join("data/resultados/graficos", self.enumModelo.name.lower())
         os.makedirs(self.output_dir, exist_ok=True)
 
-    def salvar_grafico(self, plt, nome: str):
-        """ Salva gráfico na pasta visualizacao/nome_modelo """
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="graficos")
+        self._pendentes = []
+
+    def salvar_grafico(self, fig, nome: str):
+        """ Salva gráfico na pasta visualizacao/nome_modelo e libera a figura """
         caminho = os.path.join(self.output_dir, f"{nome}.png")
-        plt.savefig(caminho, bbox_inches="tight", dpi=150)
+        fig.savefig(caminho, bbox_inches="tight", dpi=150)
+        fig.clear()
         print(f"Gráfico salvo: {caminho}")
-        #Caso precise visualizar só retirar o comentário
-        #plt.show()
-                 
+
+    def aguarde(self):
+        """ Aguarda a conclusão dos gráficos enviados para renderização """
+        pendentes, self._pendentes = self._pendentes, []
+        for futuro in pendentes:
+            futuro.result()
+
+    @staticmethod
+    def _nova_figura(**kwargs):
+        """ Cria uma figura no backend 'Agg' (importa o matplotlib sob demanda) """
+        import matplotlib
+
+        # Backend sem interface gráfica: permite renderizar fora da thread principal
+        matplotlib.use("Agg")
+        from matplotlib.figure import Figure
+
+        return Figure(**kwargs)
+
+    def _agende(self, funcao, *args):
+        self._pendentes.append(self._executor.submit(self._renderize, funcao, *args))
+
+    @staticmethod
+    def _renderize(funcao, *args):
+        with OrcamentoDeThreads.reserve("gráficos", desejado=1, limitar_blas=False):
+            funcao(*args)
+
+    @staticmethod
+    def dizime(valores, max_pontos):
+        """
+        Reduz uma curva a no máximo 'max_pontos' pontos igualmente espaçados,
+        mantendo sempre o primeiro e o último ponto.
+
+        Retorna:
+            tuple(np.ndarray, np.ndarray): índices (eixo x) e valores da curva.
+        """
+        valores = np.asarray(valores)
+        if len(valores) <= max_pontos:
+            return np.arange(len(valores)), valores
+
+        indices = np.unique(np.linspace(0, len(valores) - 1, max_pontos).astype(int))
+        return indices, valores[indices]
+
+    # ==========================================================
+    # CURVA DE ERRO
+    # ==========================================================
     def gere_grafico_curva_de_erro(self, resultado, tipo_usina):
-        # Plotando curva de erro
-        epochs = len(resultado['validation_0']['rmse'])
-        x_axis = range(0, epochs)
+        treino = np.asarray(resultado['validation_0']['rmse'])
+        validacao = np.asarray(resultado['validation_1']['rmse'])
+        self._agende(self._desenhe_curva_de_erro, treino, validacao, tipo_usina)
+
+    def _desenhe_curva_de_erro(self, treino, validacao, tipo_usina):
+        # Plotando curva de erro (decimada)
+        x_treino, y_treino = GerenciadorDeGraficos.dizime(treino, self.MAX_PONTOS_CURVA)
+        x_validacao, y_validacao = GerenciadorDeGraficos.dizime(validacao, self.MAX_PONTOS_CURVA)
 
-        plt.figure(figsize=(8,5))
-        plt.plot(x_axis, resultado['validation_0']['rmse'], label="Treino", color="blue")
-        plt.plot(x_axis, resultado['validation_1']['rmse'], label="Validação", color="red")
-        plt.xlabel("Iterações (árvores adicionadas)")
-        plt.ylabel("RMSE")
-        plt.title(f"Curva de Erro {tipo_usina.value} (RMSE) - XGBoost")
-        plt.legend()
-        plt.grid(True)
+        fig = GerenciadorDeGraficos._nova_figura(figsize=(8, 5))
+        ax = fig.add_subplot()
+        ax.plot(x_treino, y_treino, label="Treino", color="blue")
+        ax.plot(x_validacao, y_validacao, label="Validação", color="red")
+        ax.set_xlabel("Iterações (árvores adicionadas)")
+        ax.set_ylabel("RMSE")
+        ax.set_title(f"Curva de Erro {tipo_usina.value} (RMSE) - XGBoost")
+        ax.legend()
+        ax.grid(True)
 
-        self.salvar_grafico(plt, f"curva_erro_{tipo_usina.value}")
+        self.salvar_grafico(fig, f"curva_erro_{tipo_usina.value}")
 
+    # ==========================================================
+    # PREDITO VS REAL (AGREGADO POR DENSIDADE)
+    # ==========================================================
     def gere_grafico_programada_real(self, y_test, y_pred, tipo_usina):
-        plt.figure(figsize=(8,6))
-        plt.scatter(y_test, y_pred, alpha=0.3, s=20)
-        plt.plot([y_test.min(), y_test.max()], [y_test.min(), y_test.max()], 'r--')  # linha y=x
-        plt.xlim(0, 2)  
-        plt.ylim(0, 2)  
-        plt.xlabel("Fator de Capacidade Real")
-        plt.ylabel("Fator de Capacidade Predito")
-        plt.title(F"Predito vs Real - Fator de Capacidade ({tipo_usina.value})")
-
-        self.salvar_grafico(plt, f"geracao_real_predita_{tipo_usina.value}")
\ No newline at end of file
+        y_test = np.asarray(y_test, dtype=np.float32)
+        y_pred = np.asarray(y_pred, dtype=np.float32)
+        self._agende(self._desenhe_programada_real, y_test, y_pred, tipo_usina)
+
+    def _desenhe_programada_real(self, y_test, y_pred, tipo_usina):
+        fig = GerenciadorDeGraficos._nova_figura(figsize=(8, 8))
+        grade = fig.add_gridspec(2, 2, width_ratios=(4, 1), height_ratios=(1, 4),
+                                 wspace=0.05, hspace=0.05)
+        ax = fig.add_subplot(grade[1, 0])
+        ax_topo = fig.add_subplot(grade[0, 0], sharex=ax)
+        ax_lado = fig.add_subplot(grade[1, 1], sharey=ax)
+
+        # Densidade de pontos (hexbin) no lugar de um marcador por linha
+        hb = ax.hexbin(y_test, y_pred, gridsize=self.TAMANHO_GRADE_HEXBIN,
+                       extent=(0, 2, 0, 2), bins="log", mincnt=1, cmap="viridis")
+        ax.plot([y_test.min(), y_test.max()], [y_test.min(), y_test.max()], 'r--')  # linha y=x
+        ax.set_xlim(0, 2)
+        ax.set_ylim(0, 2)
+        ax.set_xlabel("Fator de Capacidade Real")
+        ax.set_ylabel("Fator de Capacidade Predito")
+
+        # Distribuições marginais
+        bins = np.linspace(0, 2, 81)
+        ax_topo.hist(y_test, bins=bins, color="gray")
+        ax_lado.hist(y_pred, bins=bins, color="gray", orientation="horizontal")
+        ax_topo.tick_params(labelbottom=False)
+        ax_lado.tick_params(labelleft=False)
+
+        # Estatísticas resumidas
+        erro = y_pred - y_test
+        estatisticas = (
+            f"n = {len(y_test)}\n"
+            f"viés = {erro.mean():.3f}\n"
+            f"MAE = {np.abs(erro).mean():.3f}\n"
+            f"média real = {y_test.mean():.3f}\n"
+            f"média predita = {y_pred.mean():.3f}"
+        )
+        ax.text(0.03, 0.97, estatisticas, transform=ax.transAxes, va="top", fontsize=9,
+                bbox={"boxstyle": "round", "facecolor": "white", "alpha": 0.8})
+
+        fig.colorbar(hb, cax=fig.add_subplot(grade[0, 1]), label="contagem (log)")
+        fig.suptitle(f"Predito vs Real - Fator de Capacidade ({tipo_usina.value})")
+
+        self.salvar_grafico(fig, f"geracao_real_predita_{tipo_usina.value}")
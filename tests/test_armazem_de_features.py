@@ -0,0 +1,83 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.armazem_de_features import ArmazemDeFeatures
+
+
+@pytest.fixture
+def diretorio_de_trabalho(tmp_path, monkeypatch):
+    """ Executa o teste em um diretório vazio (os caminhos 'data/...' são relativos). """
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def dados_de_treino(n_horas=48):
+    instantes = pd.date_range("2024-01-01", periods=n_horas, freq="h")
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "nomeUsina": ["USINA A"] * n_horas,
+        "din_instante": instantes,
+        "vento_medio_m_s": rng.uniform(0, 12, n_horas),
+        "hora": instantes.hour,
+        "mes": instantes.month,
+        "fator_capacidade": rng.uniform(0, 1, n_horas),
+    })
+
+
+def test_assinatura_muda_com_as_features_derivadas():
+    base = ArmazemDeFeatures.calcule_assinatura("origem", ["a"], "alvo")
+    configuracao = {"colunas": ["a"], "lags": [1], "janelas": [], "ciclicas": {}}
+
+    com_lags = ArmazemDeFeatures.calcule_assinatura(
+        "origem", ["a"], "alvo", features_derivadas={"features_temporais": {"configuracao": configuracao, "versao": 1}}
+    )
+    outra_versao = ArmazemDeFeatures.calcule_assinatura(
+        "origem", ["a"], "alvo", features_derivadas={"features_temporais": {"configuracao": configuracao, "versao": 2}}
+    )
+
+    assert len({base, com_lags, outra_versao}) == 3
+
+
+def test_armazem_reconstruido_quando_a_configuracao_temporal_muda(diretorio_de_trabalho, monkeypatch):
+    pytest.importorskip("xgboost")
+    from scripts.modelos.features_temporais import GeradorDeFeaturesTemporais
+    from scripts.modelos.modelos_regressao import ModelosEnum
+    from scripts.modelos.processador_regressao import ProcessadorDeRegressao
+    from scripts.modelos.tipos_de_usinas import TipoDeUsinasEnum
+
+    def novo_processador(lags):
+        processador = ProcessadorDeRegressao(
+            modelo_enum=ModelosEnum.XGBOOST,
+            df_dados_treino=dados_de_treino(),
+            df_dados_predicao=dados_de_treino(),
+            nome_arquivo="resultado_teste.csv",
+            previsao="fator_capacidade",
+            tipoDeUsina=TipoDeUsinasEnum.EOLICA,
+        )
+        processador.feature_cols = ["vento_medio_m_s", "hora", "mes"]
+        processador.features_temporais = {
+            "colunas": ["vento_medio_m_s"], "lags": lags, "janelas": [], "ciclicas": {},
+        }
+        processador.adicione_features_temporais(processador.df_dados_treino)
+        return processador
+
+    primeiro = novo_processador(lags=[1]).obtenha_armazem_de_features()
+    reutilizado = novo_processador(lags=[1]).obtenha_armazem_de_features()
+    assert reutilizado.diretorio == primeiro.diretorio
+
+    # Mesmo arquivo e mesmas colunas preditoras, mas outra configuração
+    processador = novo_processador(lags=[1])
+    processador.features_temporais = dict(processador.features_temporais, janelas=[3])
+    reconstruido = processador.obtenha_armazem_de_features()
+
+    assert reconstruido.diretorio != primeiro.diretorio
+    assert reconstruido.schema["assinatura"] != primeiro.schema["assinatura"]
+    assert os.path.exists(os.path.join(reconstruido.diretorio, "X.npy"))
+
+    # Nova versão do cálculo com a mesma configuração
+    monkeypatch.setattr(GeradorDeFeaturesTemporais, "VERSAO_CALCULO", GeradorDeFeaturesTemporais.VERSAO_CALCULO + 1)
+    nova_versao = novo_processador(lags=[1]).obtenha_armazem_de_features()
+    assert nova_versao.diretorio not in (primeiro.diretorio, reconstruido.diretorio)
@@ -0,0 +1,227 @@
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+
+from utils.escrita_atomica import EscritaAtomica
+from utils.retencao_de_cache import RetencaoDeCache
+
+
+class ArmazemDeFeatures:
+    """
+    Classe responsável por persistir e abrir a matriz de variáveis preditoras
+    (float32) e o vetor alvo como arrays mapeados em memória (memmap).
+
+    Estrutura de um armazém em disco (um diretório por versão dos dados):
+        data/processados/features/<nome>/<assinatura[:16]>/
+            X.npy        # matriz de features (n_linhas x n_features), float32
+            y.npy        # vetor alvo (n_linhas), float32
+            schema.json  # colunas, alvo, quantidade de linhas, assinatura e
+                         # dicionários das colunas categóricas
+
+    Colunas categóricas são gravadas com codificação de dicionário: X guarda o
+    código de cada categoria (NaN para ausente) e o schema guarda a lista de
+    categorias de cada coluna.
+
+    A abertura é feita com 'mmap_mode="r"', portanto não há cópia dos dados:
+    vários processos de treino no mesmo host compartilham as mesmas páginas
+    do cache do sistema operacional.
+
+    Uma versão publicada nunca é sobrescrita: ela é gravada em um diretório
+    temporário e publicada com uma única renomeação atômica. Jobs
+    concorrentes que constroem a mesma versão mantêm a primeira publicada, e
+    quem já abriu uma versão (inclusive processos filhos que a reabrem pelo
+    caminho) não a vê trocar de dados no meio do treino. Apenas as
+    'VERSOES_MANTIDAS' versões mais recentes de cada nome são preservadas.
+
+    Exemplo de uso:
+        armazem = ArmazemDeFeatures.obtenha("eolica", df, feature_cols, "fator_capacidade", assinatura)
+        X_train = armazem.X[indices_treino]
+    """
+
+    DIRETORIO_PADRAO = "data/processados/features"
+    VERSOES_MANTIDAS = 2
+
+    def __init__(self, diretorio):
+        """
+        Abre um armazém existente sem copiar os dados.
+
+        Parâmetros:
+            diretorio (str): diretório onde o armazém foi salvo.
+        """
+        self.diretorio = diretorio
+
+        with open(os.path.join(diretorio, "schema.json"), encoding="utf-8") as arquivo:
+            self.schema = json.load(arquivo)
+
+        self.X = np.load(os.path.join(diretorio, "X.npy"), mmap_mode="r")
+        self.y = np.load(os.path.join(diretorio, "y.npy"), mmap_mode="r")
+
+    @property
+    def n_linhas(self):
+        return self.schema["n_linhas"]
+
+    @property
+    def feature_cols(self):
+        return self.schema["feature_cols"]
+
+    # ==========================================================
+    # ASSINATURA E VALIDAÇÃO
+    # ==========================================================
+    @staticmethod
+    def calcule_assinatura(hash_origem, feature_cols, previsao, categorias=None, features_derivadas=None):
+        """
+        Gera a assinatura do armazém a partir do hash do arquivo de origem,
+        das colunas preditoras, da coluna-alvo, dos dicionários das colunas
+        categóricas (a ordem das categorias define os códigos gravados) e da
+        descrição das features derivadas calculadas após a leitura (configuração
+        e versão do cálculo), que não fazem parte do arquivo de origem.
+        """
+        conteudo = json.dumps(
+            {"origem": hash_origem, "feature_cols": list(feature_cols), "previsao": previsao,
+             "categorias": categorias or {}, "features_derivadas": features_derivadas or {}},
+            sort_keys=True, default=str
+        )
+        return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def calcule_hash_dados(df, colunas):
+        """
+        Hash estável do conteúdo das colunas de um DataFrame, usado no lugar
+        do hash do arquivo de origem quando os dados não vêm de um arquivo.
+        """
+        valores = pd.util.hash_pandas_object(df[list(colunas)], index=False).to_numpy()
+        return f"dados-{hashlib.sha256(valores.tobytes()).hexdigest()}"
+
+    @staticmethod
+    def diretorio_da_versao(nome, assinatura):
+        """ Diretório da versão do armazém 'nome' com a assinatura informada. """
+        return os.path.join(ArmazemDeFeatures.DIRETORIO_PADRAO, nome, assinatura[:16])
+
+    @staticmethod
+    def esta_atualizado(nome, assinatura):
+        """
+        Verifica se já existe um armazém publicado com a mesma assinatura.
+        """
+        caminho_schema = os.path.join(ArmazemDeFeatures.diretorio_da_versao(nome, assinatura), "schema.json")
+        if not os.path.exists(caminho_schema):
+            return False
+
+        with open(caminho_schema, encoding="utf-8") as arquivo:
+            return json.load(arquivo).get("assinatura") == assinatura
+
+    # ==========================================================
+    # CONVERSÃO E PERSISTÊNCIA
+    # ==========================================================
+    @staticmethod
+    def matriz(df, feature_cols, destino=None, categorias=None):
+        """
+        Converte as colunas preditoras de um DataFrame em uma matriz float32,
+        preenchendo coluna a coluna (evita a cópia intermediária em float64
+        gerada por 'df[feature_cols]'). Colunas categóricas são convertidas
+        para os seus códigos (categoria ausente/desconhecida = NaN).
+
+        Parâmetros:
+            df: DataFrame de origem (não é alterado)
+            feature_cols: lista de colunas preditoras
+            destino: array (ou memmap) já alocado; se None, um novo array é criado
+            categorias: dicionário coluna -> lista de categorias do treino; os
+                códigos dessas colunas seguem essa lista (rótulos não vistos no
+                treino = NaN), independentemente das categorias de 'df'
+        """
+        categorias = categorias or {}
+        if destino is None:
+            destino = np.empty((len(df), len(feature_cols)), dtype=np.float32)
+
+        for j, coluna in enumerate(feature_cols):
+            serie = df[coluna]
+            if coluna in categorias:
+                codigos = pd.Categorical(serie, categories=categorias[coluna]).codes
+                destino[:, j] = np.where(codigos < 0, np.nan, codigos).astype(np.float32)
+            elif hasattr(serie, "cat"):
+                codigos = serie.cat.codes.to_numpy()
+                destino[:, j] = np.where(codigos < 0, np.nan, codigos).astype(np.float32)
+            else:
+                destino[:, j] = serie.to_numpy(dtype=np.float32)
+
+        return destino
+
+    @staticmethod
+    def salve(nome, df, feature_cols, previsao, assinatura):
+        """
+        Persiste as features e o alvo do DataFrame como arrays .npy mapeáveis
+        em memória. A escrita ocorre em um diretório temporário publicado com
+        uma única renomeação no diretório da versão; se outro processo
+        publicar a mesma versão antes, a cópia temporária é descartada e a
+        versão já publicada é aberta.
+
+        Retorna:
+            ArmazemDeFeatures: armazém da versão, aberto em modo somente leitura.
+        """
+        diretorio = ArmazemDeFeatures.diretorio_da_versao(nome, assinatura)
+        n_linhas = len(df)
+
+        # A versão publicada primeiro nunca é substituída
+        with EscritaAtomica.diretorio(diretorio, substituir=False) as diretorio_tmp:
+            X = np.lib.format.open_memmap(
+                os.path.join(diretorio_tmp, "X.npy"), mode="w+",
+                dtype=np.float32, shape=(n_linhas, len(feature_cols))
+            )
+            ArmazemDeFeatures.matriz(df, feature_cols, destino=X)
+            X.flush()
+            del X
+
+            y = np.lib.format.open_memmap(
+                os.path.join(diretorio_tmp, "y.npy"), mode="w+",
+                dtype=np.float32, shape=(n_linhas,)
+            )
+            y[:] = df[previsao].to_numpy(dtype=np.float32)
+            y.flush()
+            del y
+
+            schema = {
+                "feature_cols": list(feature_cols),
+                "previsao": previsao,
+                "n_linhas": n_linhas,
+                "dtype": "float32",
+                "assinatura": assinatura,
+                "categorias": {
+                    coluna: df[coluna].cat.categories.tolist()
+                    for coluna in feature_cols if hasattr(df[coluna], "cat")
+                },
+            }
+            with open(os.path.join(diretorio_tmp, "schema.json"), "w", encoding="utf-8") as arquivo:
+                json.dump(schema, arquivo, ensure_ascii=False, indent=2)
+
+        print(f"Armazém de features disponível em: {diretorio}")
+
+        ArmazemDeFeatures.remova_versoes_antigas(nome, manter=diretorio)
+        return ArmazemDeFeatures(diretorio)
+
+    @staticmethod
+    def remova_versoes_antigas(nome, manter):
+        """
+        Remove as versões publicadas de 'nome' além das 'VERSOES_MANTIDAS'
+        mais recentes (a versão 'manter' é sempre preservada). Diretórios
+        temporários de outros processos não são tocados.
+        """
+        base = os.path.join(ArmazemDeFeatures.DIRETORIO_PADRAO, nome)
+        RetencaoDeCache.mantenha_recentes(
+            base, ArmazemDeFeatures.VERSOES_MANTIDAS, manter=manter,
+            filtro=lambda entrada: os.path.isdir(os.path.join(base, entrada))
+        )
+
+    @staticmethod
+    def obtenha(nome, df, feature_cols, previsao, assinatura):
+        """
+        Abre o armazém 'nome' caso esteja atualizado; do contrário, gera um
+        novo a partir do DataFrame informado.
+        """
+        if ArmazemDeFeatures.esta_atualizado(nome, assinatura):
+            diretorio = ArmazemDeFeatures.diretorio_da_versao(nome, assinatura)
+            os.utime(diretorio)  # marca a versão como recente (ver 'remova_versoes_antigas')
+            print(f"Armazém de features reutilizado: {diretorio}")
+            return ArmazemDeFeatures(diretorio)
+
+        return ArmazemDeFeatures.salve(nome, df, feature_cols, previsao, assinatura)
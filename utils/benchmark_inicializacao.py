@@ -0,0 +1,89 @@
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+
+class BenchmarkDeInicializacao:
+    """
+    Classe responsável por medir o tempo de inicialização da linha de comando.
+
+    Para cada subcomando de 'main.py' são medidos, em processos novos:
+        - 'python main.py <subcomando> --help' (apenas o menu, sem processamento);
+        - a importação do módulo do processador do subcomando (custo que o
+          subcomando paga antes de começar a trabalhar).
+
+    Exemplo de uso:
+        python -m utils.benchmark_inicializacao --repeticoes 5
+    """
+
+    # Meta de tempo para o '--help' (segundos)
+    META_AJUDA = 1.0
+
+    @staticmethod
+    def meca(comando, repeticoes):
+        """
+        Executa o comando 'repeticoes' vezes e retorna a mediana do tempo (s),
+        ou None se o comando falhar.
+        """
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            resultado = subprocess.run(comando, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            if resultado.returncode != 0:
+                return None
+            tempos.append(time.perf_counter() - inicio)
+
+        return statistics.median(tempos)
+
+    @staticmethod
+    def execute(repeticoes=5):
+        """
+        Mede todos os subcomandos e exibe a tabela de resultados.
+
+        Retorna:
+            list[dict]: tempos medidos por subcomando.
+        """
+        from main import crie_parser
+
+        parser = crie_parser()
+        subcomandos = next(
+            acao for acao in parser._actions if isinstance(acao, argparse._SubParsersAction)
+        ).choices
+
+        resultados = [{
+            "subcomando": "(menu principal)",
+            "ajuda_s": BenchmarkDeInicializacao.meca([sys.executable, "main.py", "--help"], repeticoes),
+            "importacao_s": None,
+        }]
+
+        for nome, subparser in subcomandos.items():
+            modulo = subparser.get_default("classe").split(":")[0]
+            resultados.append({
+                "subcomando": nome,
+                "ajuda_s": BenchmarkDeInicializacao.meca(
+                    [sys.executable, "main.py", nome, "--help"], repeticoes
+                ),
+                "importacao_s": BenchmarkDeInicializacao.meca(
+                    [sys.executable, "-c", f"import {modulo}"], repeticoes
+                ),
+            })
+
+        def formate(valor):
+            return "falhou" if valor is None else f"{valor:.3f}"
+
+        print(f"{'Subcomando':<20} {'--help (s)':>12} {'importação (s)':>16}  Meta --help")
+        for resultado in resultados:
+            ajuda = resultado["ajuda_s"]
+            meta = "ok" if ajuda is not None and ajuda < BenchmarkDeInicializacao.META_AJUDA else "acima"
+            importacao = "-" if resultado["subcomando"] == "(menu principal)" else formate(resultado["importacao_s"])
+            print(f"{resultado['subcomando']:<20} {formate(ajuda):>12} {importacao:>16}  {meta}")
+
+        return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark do tempo de inicialização dos subcomandos")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Execuções por medição (mediana)")
+    BenchmarkDeInicializacao.execute(parser.parse_args().repeticoes)
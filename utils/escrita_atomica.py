@@ -0,0 +1,112 @@
+import os
+import shutil
+import threading
+
+from contextlib import contextmanager
+
+
+class EscritaAtomica:
+    """
+    Classe responsável por gravar arquivos e diretórios de forma atômica: o
+    conteúdo é escrito em um caminho temporário ao lado do destino e só é
+    publicado (renomeado para o destino) quando o bloco 'with' termina sem
+    erro. Em caso de erro o temporário é removido e o destino não muda;
+    leitores nunca veem um arquivo parcial.
+
+    Exemplo de uso:
+        with EscritaAtomica.arquivo("data/cache/dados.json") as caminho_tmp:
+            with open(caminho_tmp, "w") as arquivo:
+                json.dump(dados, arquivo)
+
+        with EscritaAtomica.diretorio("data/resultados/mapa") as diretorio_tmp:
+            np.save(os.path.join(diretorio_tmp, "X.npy"), X)
+    """
+
+    @staticmethod
+    def caminho_temporario(destino):
+        """ Caminho temporário exclusivo (processo e thread) ao lado do destino. """
+        return f"{destino}.tmp-{os.getpid()}-{threading.get_ident()}"
+
+    @staticmethod
+    def eh_temporario(caminho):
+        """ Indica se o caminho é um temporário (ou destino substituído) desta classe. """
+        nome = os.path.basename(caminho)
+        return ".tmp-" in nome or ".antigo-" in nome
+
+    @staticmethod
+    def remova(caminho):
+        """ Remove um arquivo ou diretório, se existir. """
+        if os.path.isdir(caminho):
+            shutil.rmtree(caminho, ignore_errors=True)
+        elif os.path.exists(caminho):
+            os.remove(caminho)
+
+    # ==========================================================
+    # ARQUIVOS
+    # ==========================================================
+    @staticmethod
+    @contextmanager
+    def arquivo(destino):
+        """
+        Fornece um caminho temporário para o arquivo e o publica em 'destino'
+        (substituindo o anterior) ao final do bloco. Se nada for gravado no
+        temporário, o destino não é alterado.
+        """
+        os.makedirs(os.path.dirname(destino) or ".", exist_ok=True)
+        caminho_tmp = EscritaAtomica.caminho_temporario(destino)
+        EscritaAtomica.remova(caminho_tmp)
+
+        try:
+            yield caminho_tmp
+        except BaseException:
+            EscritaAtomica.remova(caminho_tmp)
+            raise
+
+        if os.path.exists(caminho_tmp):
+            os.replace(caminho_tmp, destino)
+
+    # ==========================================================
+    # DIRETÓRIOS
+    # ==========================================================
+    @staticmethod
+    @contextmanager
+    def diretorio(destino, substituir=True):
+        """
+        Fornece um diretório temporário (já criado) e o publica em 'destino'
+        ao final do bloco.
+
+        Parâmetros:
+            destino: diretório final
+            substituir: True troca um destino existente pelo novo conteúdo;
+                False mantém o destino já publicado (ex.: por outro processo)
+                e descarta o temporário
+        """
+        os.makedirs(os.path.dirname(destino) or ".", exist_ok=True)
+        diretorio_tmp = EscritaAtomica.caminho_temporario(destino)
+        EscritaAtomica.remova(diretorio_tmp)
+        os.makedirs(diretorio_tmp)
+
+        try:
+            yield diretorio_tmp
+        except BaseException:
+            EscritaAtomica.remova(diretorio_tmp)
+            raise
+
+        try:
+            # 'rename' de diretório falha se o destino já existir e não for vazio
+            os.rename(diretorio_tmp, destino)
+            return
+        except OSError:
+            if not os.path.isdir(destino):
+                EscritaAtomica.remova(diretorio_tmp)
+                raise
+
+        if not substituir:
+            EscritaAtomica.remova(diretorio_tmp)
+            return
+
+        # Retira o destino anterior com uma renomeação e publica o novo
+        antigo = f"{destino}.antigo-{os.getpid()}-{threading.get_ident()}"
+        os.rename(destino, antigo)
+        os.rename(diretorio_tmp, destino)
+        EscritaAtomica.remova(antigo)
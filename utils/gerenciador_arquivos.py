@@ -1,21 +1,41 @@
 import pandas as pd
 import os
+import json
 import zipfile
+import hashlib
+
+from utils.escrita_atomica import EscritaAtomica
+
 
 class GerenciadorDeArquivos:
     """
     Classe responsável por gerenciar operações básicas de arquivos, como:
     - Geração de arquivos CSV a partir de listas ou dicionários de dados.
-    - Descompactação de arquivos ZIP na pasta de destino padrão.
+    - Leitura de CSVs diretamente de dentro do ZIP, em fluxo, sem extração.
+    - Cálculo do hash do conteúdo de arquivos (usado como chave de cache).
 
     Diretório padrão de trabalho:
         data/processados/
 
     Exemplo de uso:
         GerenciadorDeArquivos.gere_arquivo(dados, "resultado.csv")
-        GerenciadorDeArquivos.descompacte("resultado")
+        df = GerenciadorDeArquivos.leia_csv("resultado")
     """
 
+    # Hashes já calculados (por caminho, tamanho e mtime)
+    CAMINHO_CACHE_HASHES = "data/cache/hashes_de_arquivos.json"
+
+    @staticmethod
+    def caminho_arquivo(nome_arquivo):
+        """ Caminho de um arquivo no diretório padrão ('data/processados/{nome_arquivo}'). """
+        return os.path.join("data/processados", nome_arquivo)
+
+    @staticmethod
+    def caminho_parte(nome_arquivo, indice):
+        """ Caminho da parte 'indice' de um CSV ('data/processados/partes/{nome}/'). """
+        nome_base = os.path.splitext(nome_arquivo)[0]
+        return os.path.join("data/processados/partes", nome_base, f"parte-{indice:05d}.csv")
+
     @staticmethod
     def gere_arquivo(dados, nome_arquivo):
         """
@@ -35,7 +55,7 @@ class GerenciadorDeArquivos:
         df_result = pd.DataFrame(dados)
 
         # Caminho completo do CSV
-        caminho_csv = os.path.join("data/processados", nome_arquivo)
+        caminho_csv = GerenciadorDeArquivos.caminho_arquivo(nome_arquivo)
 
         # Cria diretório se não existir
         os.makedirs(os.path.dirname(caminho_csv), exist_ok=True)
@@ -45,31 +65,123 @@ class GerenciadorDeArquivos:
         print(f"CSV gerado em: {caminho_csv}")
 
     @staticmethod
-    def descompacte(nome_arquivo):
+    def junte_partes(caminhos_partes, nome_arquivo, tamanho_bloco=1024 * 1024):
+        """
+        Une as partes (mesmo cabeçalho) em 'data/processados/{nome_arquivo}',
+        copiando os bytes na ordem informada e mantendo um único cabeçalho.
+        """
+        caminho_csv = os.path.join("data/processados", nome_arquivo)
+        os.makedirs(os.path.dirname(caminho_csv), exist_ok=True)
+
+        with open(caminho_csv, "wb") as destino:
+            for i, caminho_parte in enumerate(caminhos_partes):
+                with open(caminho_parte, "rb") as parte:
+                    cabecalho = parte.readline()
+                    if i == 0:
+                        destino.write(cabecalho)
+                    for bloco in iter(lambda: parte.read(tamanho_bloco), b""):
+                        destino.write(bloco)
+
+        print(f"CSV gerado em: {caminho_csv} ({len(caminhos_partes)} partes)")
+
+    @staticmethod
+    def leia_csv(nome_arquivo, **kwargs):
         """
-        Descompacta um arquivo ZIP localizado no diretório 'data/processados'.
+        Lê o CSV 'nome_arquivo' do diretório 'data/processados'. Quando existe o
+        ZIP correspondente, o membro CSV é descomprimido em fluxo diretamente
+        para o 'pandas.read_csv', sem gravar a cópia extraída em disco e sem
+        manter blocos intermediários em memória.
 
         Parâmetros:
             nome_arquivo (str):
-                Nome do arquivo (sem a extensão .zip) que será descompactado.
+                Nome do arquivo (sem extensão).
+            **kwargs:
+                Parâmetros adicionais repassados ao 'pandas.read_csv'
+                (ex.: dtype={"estado": "category"}).
 
-        Efeitos:
-            - Extrai todos os arquivos do ZIP para o mesmo diretório.
-            - Exibe no console o nome do arquivo extraído.
+        Retorna:
+            pandas.DataFrame: conteúdo do CSV.
         """
-        # Caminho completo do arquivo ZIP
         zip_path = os.path.join("data/processados", nome_arquivo + '.zip')
 
-        # Diretório onde o ZIP será extraído
-        extract_dir = os.path.dirname(os.path.abspath(zip_path))
-
-        # Verifica se o arquivo ZIP existe antes de extrair
         if not os.path.exists(zip_path):
-            print(f"Arquivo ZIP não encontrado: {zip_path}")
-            return
+            return pd.read_csv(os.path.join("data/processados", nome_arquivo + '.csv'), **kwargs)
 
-        # Extrai o conteúdo do ZIP
         with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            zip_ref.extractall(extract_dir)
+            nome_membro = GerenciadorDeArquivos._membro_csv(zip_ref, nome_arquivo)
+            with zip_ref.open(nome_membro) as membro:
+                df = pd.read_csv(membro, **kwargs)
 
-        print(f"Arquivo extraído com sucesso: {nome_arquivo}")
+        print(f"CSV lido diretamente do ZIP: {zip_path}")
+        return df
+
+    @staticmethod
+    def caminho_origem(nome_arquivo):
+        """
+        Retorna o caminho do arquivo de onde 'leia_csv' obtém os dados
+        (o ZIP, se existir; do contrário, o CSV).
+        """
+        zip_path = os.path.join("data/processados", nome_arquivo + '.zip')
+        if os.path.exists(zip_path):
+            return zip_path
+
+        return os.path.join("data/processados", nome_arquivo + '.csv')
+
+    # ==========================================================
+    # MÉTODOS AUXILIARES
+    # ==========================================================
+    @staticmethod
+    def _membro_csv(zip_ref, nome_arquivo):
+        """Localiza o membro CSV do ZIP (preferindo '<nome_arquivo>.csv')."""
+        nomes = [n for n in zip_ref.namelist() if n.lower().endswith(".csv")]
+        for nome in nomes:
+            if os.path.basename(nome) == nome_arquivo + ".csv":
+                return nome
+
+        if not nomes:
+            raise FileNotFoundError(f"Nenhum CSV encontrado no ZIP: {nome_arquivo}.zip")
+
+        return nomes[0]
+
+    @staticmethod
+    def calcule_hash(caminho, tamanho_bloco=1024 * 1024):
+        """
+        Calcula o hash SHA-256 do conteúdo de um arquivo, lendo-o em blocos
+        para não carregar o arquivo inteiro em memória. O resultado fica
+        registrado em 'CAMINHO_CACHE_HASHES' com o tamanho e a data de
+        modificação do arquivo; enquanto eles não mudarem, o hash não é
+        recalculado.
+
+        Parâmetros:
+            caminho (str):
+                Caminho do arquivo.
+            tamanho_bloco (int):
+                Quantidade de bytes lidos por vez.
+
+        Retorna:
+            str: hash hexadecimal do conteúdo do arquivo.
+        """
+        estado = os.stat(caminho)
+        chave = os.path.abspath(caminho)
+        registro = {"tamanho": estado.st_size, "mtime_ns": estado.st_mtime_ns}
+
+        cache = {}
+        if os.path.exists(GerenciadorDeArquivos.CAMINHO_CACHE_HASHES):
+            with open(GerenciadorDeArquivos.CAMINHO_CACHE_HASHES, encoding="utf-8") as arquivo:
+                cache = json.load(arquivo)
+
+        anterior = cache.get(chave, {})
+        if {"tamanho": anterior.get("tamanho"), "mtime_ns": anterior.get("mtime_ns")} == registro:
+            return anterior["hash"]
+
+        sha = hashlib.sha256()
+        with open(caminho, "rb") as arquivo:
+            for bloco in iter(lambda: arquivo.read(tamanho_bloco), b""):
+                sha.update(bloco)
+
+        cache[chave] = {**registro, "hash": sha.hexdigest()}
+        with EscritaAtomica.arquivo(GerenciadorDeArquivos.CAMINHO_CACHE_HASHES) as caminho_tmp:
+            with open(caminho_tmp, "w", encoding="utf-8") as arquivo:
+                json.dump(cache, arquivo, indent=2)
+
+        return cache[chave]["hash"]
@@ -0,0 +1,367 @@
+import os
+import time
+import tempfile
+import threading
+
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: apenas o orçamento do processo
+    fcntl = None
+
+
+class OrcamentoDeThreads:
+    """
+    Classe responsável por distribuir um orçamento único de threads do host
+    entre as etapas que paralelizam trabalho: ajustes de modelos (n_jobs do
+    XGBoost e do Random Forest), pools BLAS/OpenMP (NumPy, MLP), consultas
+    HTTP simultâneas e pools de processos.
+
+    Cada etapa reserva threads com 'reserve' e as devolve ao sair do bloco;
+    enquanto o orçamento estiver esgotado, novas reservas aguardam.
+
+    O orçamento é compartilhado por todas as execuções do 'main.py' no mesmo
+    host: cada thread do orçamento é uma ficha (arquivo em
+    'DIRETORIO_FICHAS') travada com 'flock' enquanto estiver reservada. Jobs
+    concorrentes disputam as mesmas fichas, e as travas de um processo que
+    termina (inclusive de forma abrupta) são liberadas pelo sistema
+    operacional. Se as fichas pertencerem a outro usuário sem permissão de
+    acesso, o usuário passa a usar um diretório de fichas próprio. Sem
+    'fcntl' (Windows), o orçamento vale apenas para o processo.
+
+    O orçamento é definido, em ordem de prioridade, pela opção '--threads'
+    da linha de comando, pela variável de ambiente ORCAMENTO_THREADS ou pelo
+    número de CPUs; execuções com orçamentos diferentes compartilham as
+    primeiras fichas. Pools de processos repassam a cada processo filho a sua
+    fração da reserva do processo pai (ver 'inicialize_processo'); os filhos
+    dividem essa fração apenas entre si, sem disputar as fichas do host.
+
+    Os pools BLAS/OpenMP são globais ao processo: enquanto houver reservas
+    simultâneas, eles ficam limitados à menor quantidade concedida, e o
+    limite original é restaurado quando a última reserva termina.
+
+    Reservas não devem ser aninhadas na mesma thread: a reserva interna
+    poderia aguardar threads retidas pela externa.
+
+    Exemplo de uso:
+        with OrcamentoDeThreads.reserve("treino xgboost") as n_threads:
+            modelo.set_params(n_jobs=n_threads)
+            modelo.fit(X, y)
+        OrcamentoDeThreads.relatorio()
+    """
+
+    VARIAVEL_AMBIENTE = "ORCAMENTO_THREADS"
+    VARIAVEL_DIRETORIO = "ORCAMENTO_THREADS_DIRETORIO"
+
+    # Fichas compartilhadas pelas execuções do host
+    DIRETORIO_FICHAS = os.path.join(tempfile.gettempdir(), "orcamento_threads")
+
+    _total = None
+    _em_uso = 0
+    _pico = 0
+    _inicio = time.perf_counter()
+    _condicao = threading.Condition()
+    _etapas = {}
+
+    # Fichas do host (desativadas nos processos filhos dos pools)
+    _fichas_do_host = fcntl is not None
+    _fichas_abertas = set()
+    _diretorio_do_usuario = None
+
+    # Limites BLAS/OpenMP das reservas ativas e controlador do limite original
+    _limites_ativos = []
+    _limite_original = None
+
+    # ==========================================================
+    # CONFIGURAÇÃO
+    # ==========================================================
+    @staticmethod
+    def configure(total=None):
+        """
+        Define o orçamento de threads deste processo e o exporta no ambiente,
+        de modo que subprocessos o herdem.
+
+        Parâmetros:
+            total: quantidade de threads; None = ORCAMENTO_THREADS ou número de CPUs
+        """
+        if not total:
+            valor = os.getenv(OrcamentoDeThreads.VARIAVEL_AMBIENTE, "").strip()
+            total = int(valor) if valor else os.cpu_count() or 1
+
+        with OrcamentoDeThreads._condicao:
+            OrcamentoDeThreads._total = max(1, int(total))
+            OrcamentoDeThreads._inicio = time.perf_counter()
+            OrcamentoDeThreads._condicao.notify_all()
+
+        os.environ[OrcamentoDeThreads.VARIAVEL_AMBIENTE] = str(OrcamentoDeThreads._total)
+        return OrcamentoDeThreads._total
+
+    @staticmethod
+    def total():
+        """ Retorna o orçamento de threads do processo (configurando-o se necessário). """
+        if OrcamentoDeThreads._total is None:
+            OrcamentoDeThreads.configure()
+        return OrcamentoDeThreads._total
+
+    @staticmethod
+    def inicialize_processo(total):
+        """
+        Inicializador de processos filhos (ProcessPoolExecutor): aplica a
+        fração da reserva do processo pai destinada ao filho, inclusive aos
+        pools BLAS/OpenMP. As fichas do host já estão retidas pelo pai: o
+        filho fecha as cópias herdadas e passa a usar apenas o orçamento local.
+        """
+        for descritor in list(OrcamentoDeThreads._fichas_abertas):
+            os.close(descritor)
+        OrcamentoDeThreads._fichas_abertas.clear()
+        OrcamentoDeThreads._fichas_do_host = False
+
+        OrcamentoDeThreads.configure(total)
+        OrcamentoDeThreads._limites_ativos = []
+        OrcamentoDeThreads._limite_original = None
+        OrcamentoDeThreads._limite_blas(total)
+
+    # ==========================================================
+    # RESERVAS
+    # ==========================================================
+    @staticmethod
+    @contextmanager
+    def reserve(etapa, desejado=None, minimo=1, limitar_blas=True):
+        """
+        Reserva threads do orçamento durante o bloco 'with'.
+
+        Aguarda até haver ao menos 'minimo' threads livres e concede até
+        'desejado' (padrão: o orçamento inteiro).
+
+        Parâmetros:
+            etapa: nome usado no relatório de utilização
+            desejado: quantidade pretendida de threads
+            minimo: quantidade mínima para iniciar a etapa
+            limitar_blas: limita os pools BLAS/OpenMP à quantidade concedida
+
+        Retorna (no 'with'):
+            int: quantidade de threads concedida.
+        """
+        total = OrcamentoDeThreads.total()
+        desejado = min(desejado or total, total)
+        minimo = min(minimo, desejado)
+
+        inicio_espera = time.perf_counter()
+        fichas = []
+        concedido = None
+        blas_ajustado = False
+        try:
+            if OrcamentoDeThreads._fichas_do_host:
+                fichas = OrcamentoDeThreads._aguarde_fichas(minimo, desejado, total)
+
+            with OrcamentoDeThreads._condicao:
+                if OrcamentoDeThreads._fichas_do_host:
+                    concedido = len(fichas)
+                else:
+                    OrcamentoDeThreads._condicao.wait_for(
+                        lambda: OrcamentoDeThreads._total - OrcamentoDeThreads._em_uso >= minimo
+                    )
+                    concedido = min(desejado, OrcamentoDeThreads._total - OrcamentoDeThreads._em_uso)
+                OrcamentoDeThreads._em_uso += concedido
+                OrcamentoDeThreads._pico = max(OrcamentoDeThreads._pico, OrcamentoDeThreads._em_uso)
+                inicio = time.perf_counter()
+
+            if limitar_blas:
+                OrcamentoDeThreads._ajuste_blas(adicionar=concedido)
+                blas_ajustado = True
+
+            yield concedido
+        finally:
+            # Devolve apenas o que foi de fato obtido (a reserva pode falhar no meio)
+            if blas_ajustado:
+                OrcamentoDeThreads._ajuste_blas(remover=concedido)
+            OrcamentoDeThreads._libere_fichas(fichas)
+
+            if concedido is not None:
+                OrcamentoDeThreads._registre_etapa(etapa, concedido, inicio_espera, inicio)
+
+    @staticmethod
+    def _registre_etapa(etapa, concedido, inicio_espera, inicio):
+        """ Devolve as threads ao orçamento do processo e acumula as estatísticas da etapa. """
+        fim = time.perf_counter()
+        with OrcamentoDeThreads._condicao:
+            OrcamentoDeThreads._em_uso -= concedido
+            estatisticas = OrcamentoDeThreads._etapas.setdefault(
+                etapa, {"reservas": 0, "threads_max": 0, "duracao_s": 0.0,
+                        "threads_s": 0.0, "espera_s": 0.0}
+            )
+            estatisticas["reservas"] += 1
+            estatisticas["threads_max"] = max(estatisticas["threads_max"], concedido)
+            estatisticas["duracao_s"] += fim - inicio
+            estatisticas["threads_s"] += concedido * (fim - inicio)
+            estatisticas["espera_s"] += inicio - inicio_espera
+            OrcamentoDeThreads._condicao.notify_all()
+
+    # ==========================================================
+    # FICHAS DO HOST
+    # ==========================================================
+    @staticmethod
+    def _aguarde_fichas(minimo, desejado, total):
+        """
+        Trava até 'desejado' fichas livres dentre as 'total' do host,
+        aguardando (com espera crescente) até obter ao menos 'minimo'.
+
+        Retorna:
+            list[int]: descritores das fichas travadas.
+        """
+        diretorio = OrcamentoDeThreads._diretorio_fichas()
+
+        espera = 0.05
+        while True:
+            fichas = []
+            inacessiveis = 0
+            for indice in range(total):
+                if len(fichas) == desejado:
+                    break
+
+                # Somente leitura: basta para o 'flock' e funciona com fichas de outros usuários
+                try:
+                    descritor = os.open(os.path.join(diretorio, f"ficha-{indice:04d}"), os.O_CREAT | os.O_RDONLY, 0o666)
+                except OSError:
+                    inacessiveis += 1
+                    continue
+
+                try:
+                    fcntl.flock(descritor, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    os.close(descritor)
+                    continue
+                fichas.append(descritor)
+
+            if len(fichas) >= minimo:
+                with OrcamentoDeThreads._condicao:
+                    OrcamentoDeThreads._fichas_abertas.update(fichas)
+                return fichas
+
+            for descritor in fichas:
+                os.close(descritor)
+
+            # Sem acesso a fichas suficientes, a espera nunca terminaria
+            if total - inacessiveis < minimo:
+                diretorio = OrcamentoDeThreads._diretorio_fichas(inacessivel=diretorio)
+                continue
+
+            time.sleep(espera)
+            espera = min(espera * 2, 0.5)
+
+    @staticmethod
+    def _diretorio_fichas(inacessivel=None):
+        """
+        Diretório das fichas do host (ORCAMENTO_THREADS_DIRETORIO ou
+        'DIRETORIO_FICHAS'). Quando ele (ou parte das fichas) pertence a outro
+        usuário sem permissão de acesso, passa a usar um diretório próprio do
+        usuário ('<diretorio>-<uid>'), compartilhado apenas pelas execuções
+        dele.
+
+        Parâmetros:
+            inacessivel: diretório em que as fichas não puderam ser abertas
+        """
+        diretorio = OrcamentoDeThreads._diretorio_do_usuario or \
+            os.getenv(OrcamentoDeThreads.VARIAVEL_DIRETORIO, OrcamentoDeThreads.DIRETORIO_FICHAS)
+
+        if diretorio != inacessivel:
+            try:
+                os.makedirs(diretorio, exist_ok=True)
+                return diretorio
+            except OSError:
+                inacessivel = diretorio
+
+        if OrcamentoDeThreads._diretorio_do_usuario is not None:
+            raise PermissionError(f"Fichas do orçamento de threads inacessíveis em: {inacessivel}")
+
+        OrcamentoDeThreads._diretorio_do_usuario = f"{inacessivel}-{os.getuid()}"
+        print(f"Fichas do orçamento de threads inacessíveis em {inacessivel}; "
+              f"usando {OrcamentoDeThreads._diretorio_do_usuario}")
+        os.makedirs(OrcamentoDeThreads._diretorio_do_usuario, exist_ok=True)
+        return OrcamentoDeThreads._diretorio_do_usuario
+
+    @staticmethod
+    def _libere_fichas(fichas):
+        """ Destrava (fechando os descritores) as fichas de uma reserva. """
+        with OrcamentoDeThreads._condicao:
+            for descritor in fichas:
+                if descritor in OrcamentoDeThreads._fichas_abertas:
+                    OrcamentoDeThreads._fichas_abertas.discard(descritor)
+                    os.close(descritor)
+
+    # ==========================================================
+    # LIMITES BLAS/OPENMP
+    # ==========================================================
+    @staticmethod
+    def _ajuste_blas(adicionar=None, remover=None):
+        """
+        Registra (ou remove) o limite de uma reserva e aplica aos pools
+        BLAS/OpenMP do processo o menor limite entre as reservas ativas;
+        sem reservas ativas, restaura o limite original.
+        """
+        with OrcamentoDeThreads._condicao:
+            if adicionar is not None:
+                if not OrcamentoDeThreads._limites_ativos and OrcamentoDeThreads._limite_original is None:
+                    OrcamentoDeThreads._limite_original = OrcamentoDeThreads._limite_blas(None)
+                OrcamentoDeThreads._limites_ativos.append(adicionar)
+            if remover is not None:
+                OrcamentoDeThreads._limites_ativos.remove(remover)
+
+            try:
+                if OrcamentoDeThreads._limites_ativos:
+                    OrcamentoDeThreads._limite_blas(min(OrcamentoDeThreads._limites_ativos))
+                elif OrcamentoDeThreads._limite_original is not None:
+                    OrcamentoDeThreads._limite_original.restore_original_limits()
+                    OrcamentoDeThreads._limite_original = None
+            except BaseException:
+                # Uma reserva que falhou ao aplicar o limite não fica registrada
+                if adicionar is not None:
+                    OrcamentoDeThreads._limites_ativos.remove(adicionar)
+                raise
+
+    @staticmethod
+    def _limite_blas(n_threads):
+        """
+        Limita os pools BLAS/OpenMP do processo (threadpoolctl, instalado com
+        o scikit-learn); None apenas registra os limites atuais. Retorna o
+        controlador (que restaura os limites anteriores), ou None se
+        indisponível.
+        """
+        try:
+            from threadpoolctl import threadpool_limits
+        except ImportError:
+            return None
+        return threadpool_limits(limits=n_threads)
+
+    # ==========================================================
+    # RELATÓRIO DE UTILIZAÇÃO
+    # ==========================================================
+    @staticmethod
+    def relatorio():
+        """
+        Exibe, por etapa, as reservas, a duração, as threads·segundo usadas e
+        o tempo de espera, além da utilização global do orçamento.
+
+        Retorna:
+            dict: estatísticas por etapa e utilização global (0 a 1).
+        """
+        total = OrcamentoDeThreads.total()
+        decorrido = time.perf_counter() - OrcamentoDeThreads._inicio
+
+        with OrcamentoDeThreads._condicao:
+            etapas = {nome: dict(valores) for nome, valores in OrcamentoDeThreads._etapas.items()}
+            pico = OrcamentoDeThreads._pico
+
+        if not etapas:
+            return {"etapas": {}, "utilizacao": 0.0}
+
+        utilizacao = sum(e["threads_s"] for e in etapas.values()) / (total * decorrido) if decorrido else 0.0
+
+        print(f"Orçamento de threads: {total} | pico em uso: {pico} | utilização: {utilizacao:.0%} em {decorrido:.1f}s")
+        print(f"{'Etapa':<28} {'Reservas':>8} {'Threads':>8} {'Duração (s)':>12} {'Threads·s':>10} {'Espera (s)':>11}")
+        for nome, e in etapas.items():
+            print(f"{nome:<28} {e['reservas']:>8} {e['threads_max']:>8} {e['duracao_s']:>12.1f} "
+                  f"{e['threads_s']:>10.1f} {e['espera_s']:>11.1f}")
+
+        return {"etapas": etapas, "utilizacao": utilizacao}
@@ -0,0 +1,146 @@
+import time
+import queue
+import threading
+
+
+class PipelineEmEstagios:
+    """
+    Classe responsável por executar um processamento em estágios sobrepostos:
+    cada estágio roda em sua própria thread e se comunica com o seguinte por
+    uma fila limitada. Quando um estágio é mais lento, a fila à sua frente
+    enche e os estágios anteriores aguardam (contrapressão), limitando a
+    memória a 'tamanho_fila' itens por fila.
+
+    Com estágios que liberam o GIL (rede, banco, disco, NumPy/pandas), o
+    tempo total se aproxima do tempo do estágio mais lento, e não da soma
+    dos estágios.
+
+    Um erro em qualquer estágio interrompe a fonte, descarta os itens em
+    trânsito e é relançado por 'execute'.
+
+    Exemplo de uso:
+        pipeline = PipelineEmEstagios(tamanho_fila=4)
+        pipeline.execute(
+            ("leitura", iter(lotes)),
+            [("transformação", transforme), ("escrita", escreva)]
+        )
+    """
+
+    # Marca de fim de fluxo entre os estágios
+    _FIM = object()
+
+    def __init__(self, tamanho_fila=4):
+        self.tamanho_fila = tamanho_fila
+        self.estatisticas = {}
+        self._erro = None
+        self._trava = threading.Lock()
+
+    # ==========================================================
+    # EXECUÇÃO
+    # ==========================================================
+    def execute(self, fonte, estagios):
+        """
+        Executa o pipeline até o fim da fonte.
+
+        Parâmetros:
+            fonte: tupla (nome, iterável) que produz os itens
+            estagios: lista de tuplas (nome, função); cada função recebe um
+                item e retorna o item do estágio seguinte (None descarta o item)
+
+        Retorna:
+            dict: estatísticas por estágio (itens e tempo ocupado, em segundos).
+
+        Exceções:
+            Relança a primeira exceção ocorrida em qualquer estágio.
+        """
+        filas = [queue.Queue(maxsize=self.tamanho_fila) for _ in estagios]
+        nome_fonte, iteravel = fonte
+
+        threads = [threading.Thread(
+            target=self._execute_fonte, args=(nome_fonte, iteravel, filas[0]),
+            name=f"pipeline-{nome_fonte}", daemon=True
+        )]
+        for i, (nome, funcao) in enumerate(estagios):
+            saida = filas[i + 1] if i + 1 < len(filas) else None
+            threads.append(threading.Thread(
+                target=self._execute_estagio, args=(nome, funcao, filas[i], saida),
+                name=f"pipeline-{nome}", daemon=True
+            ))
+
+        inicio = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        decorrido = time.perf_counter() - inicio
+
+        self.relatorio(decorrido)
+
+        if self._erro is not None:
+            raise self._erro
+
+        return self.estatisticas
+
+    def _registre(self, nome, duracao):
+        with self._trava:
+            estatistica = self.estatisticas.setdefault(nome, {"itens": 0, "ocupado_s": 0.0})
+            estatistica["itens"] += 1
+            estatistica["ocupado_s"] += duracao
+
+    def _registre_erro(self, erro):
+        with self._trava:
+            if self._erro is None:
+                self._erro = erro
+
+    def _execute_fonte(self, nome, iteravel, saida):
+        try:
+            iterador = iter(iteravel)
+            while self._erro is None:
+                inicio = time.perf_counter()
+                try:
+                    item = next(iterador)
+                except StopIteration:
+                    break
+                self._registre(nome, time.perf_counter() - inicio)
+                saida.put(item)
+        except BaseException as erro:
+            self._registre_erro(erro)
+        finally:
+            saida.put(PipelineEmEstagios._FIM)
+
+    def _execute_estagio(self, nome, funcao, entrada, saida):
+        while True:
+            item = entrada.get()
+            if item is PipelineEmEstagios._FIM:
+                break
+
+            # Após um erro, apenas drena a fila para liberar os estágios anteriores
+            if self._erro is not None:
+                continue
+
+            inicio = time.perf_counter()
+            try:
+                resultado = funcao(item)
+            except BaseException as erro:
+                self._registre_erro(erro)
+                continue
+            self._registre(nome, time.perf_counter() - inicio)
+
+            if saida is not None and resultado is not None:
+                saida.put(resultado)
+
+        if saida is not None:
+            saida.put(PipelineEmEstagios._FIM)
+
+    # ==========================================================
+    # RELATÓRIO
+    # ==========================================================
+    def relatorio(self, decorrido):
+        """
+        Exibe o tempo ocupado de cada estágio e o tempo total. Com estágios
+        sobrepostos, o total fica próximo do maior tempo ocupado.
+        """
+        soma = sum(estatistica["ocupado_s"] for estatistica in self.estatisticas.values())
+        print(f"Pipeline concluído em {decorrido:.1f}s (soma dos estágios: {soma:.1f}s)")
+        for nome, estatistica in self.estatisticas.items():
+            print(f"  {nome:<20} {estatistica['itens']:>8} itens {estatistica['ocupado_s']:>10.1f}s ocupado")
@@ -0,0 +1,49 @@
+import os
+
+from utils.escrita_atomica import EscritaAtomica
+
+
+class RetencaoDeCache:
+    """
+    Classe responsável pela limpeza dos diretórios de cache: mantém apenas as
+    entradas (arquivos ou diretórios) usadas mais recentemente, pela data de
+    modificação. Quem reutiliza uma entrada deve atualizar a sua data
+    ('os.utime') para que ela conte como recente.
+
+    Exemplo de uso:
+        RetencaoDeCache.mantenha_recentes("data/cache/features_temporais", 8, manter=caminho_cache)
+    """
+
+    @staticmethod
+    def mantenha_recentes(diretorio, quantidade, manter=None, filtro=None):
+        """
+        Remove as entradas de 'diretorio' além das 'quantidade' mais recentes.
+
+        Parâmetros:
+            diretorio: diretório do cache
+            quantidade: quantidade de entradas mantidas (incluindo 'manter')
+            manter: entrada sempre preservada (ex.: a que acabou de ser gravada)
+            filtro: função que recebe o nome da entrada e indica se ela faz
+                parte do conjunto limpo (ex.: apenas um tipo de usina)
+
+        Retorna:
+            list[str]: caminhos removidos.
+
+        Temporários de escritas em andamento (ver EscritaAtomica) não são tocados.
+        """
+        if not os.path.isdir(diretorio):
+            return []
+
+        entradas = [
+            os.path.join(diretorio, nome) for nome in os.listdir(diretorio)
+            if not EscritaAtomica.eh_temporario(nome) and (filtro is None or filtro(nome))
+            and os.path.join(diretorio, nome) != manter
+        ]
+        entradas.sort(key=os.path.getmtime, reverse=True)
+
+        restantes = quantidade - 1 if manter is not None else quantidade
+        removidas = entradas[max(restantes, 0):]
+        for entrada in removidas:
+            EscritaAtomica.remova(entrada)
+
+        return removidas